@@ -2,6 +2,9 @@ import os
 from flask import Flask
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# must be the same in every worker (and dyno), or sessions signed by one are rejected by the others
+app.secret_key = os.environ.get("SECRET_KEY") or os.urandom(24)
 
-from app import routes
\ No newline at end of file
+from app import assets, bundles, compression, critical_css, fonts, images, metrics, redirects, routes
+
+metrics.init_app(app)
\ No newline at end of file
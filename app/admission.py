@@ -0,0 +1,165 @@
+"""
+Admission control of the contact form.
+
+Every accepted submission costs a form parse, a MIME message and a mail in the
+spool, and bots can post as fast as they like. So before any of that a
+submission must fit the size cap and get a token from two buckets, one per
+client IP and one for the whole site, kept in the local store so that all the
+workers draw from the same ones. Once the form is parsed, its fields must fit
+their caps, and the same message (sender and text) sent again within
+DUPLICATE_TTL is dropped: the message is reserved before it is queued, so two
+copies arriving at once are not both sent, and released if it could not be
+queued, so it can be retried. Each check is a single SQLite statement, so a
+rejection costs tens of microseconds. Every outcome is counted in
+admissions_total{endpoint="contact"} (app/metrics.py), so /metrics shows how
+many sends were avoided.
+"""
+
+import hashlib
+import json
+import math
+import time
+from typing import Callable, Mapping, NamedTuple, Optional
+
+from flask import Response, request
+
+from app import metrics, store
+
+
+STORE_NAME = "admission.sqlite3"
+
+
+class Limit(NamedTuple):
+    capacity: float      # burst
+    per_second: float    # refill rate
+
+
+PER_IP_LIMIT = Limit(5, 6 / 3600)
+GLOBAL_LIMIT = Limit(30, 60 / 3600)
+DUPLICATE_TTL = 600
+MAX_BODY = 16 * 1024
+FIELD_LIMITS = {"name": 200, "email": 254, "subject": 300, "message": 10000, "url_from": 500, "lang": 8}
+CLEANUP_INTERVAL = 300
+IDLE_BUCKET = 86400      # a bucket untouched this long is full again anyway
+
+
+class Admission:
+    """
+    Token buckets and recent-message digests shared by the workers through the local store.
+    """
+
+    def __init__(self, store_name: str = STORE_NAME, clock: Callable[[], float] = time.time):
+        self._store_name = store_name
+        self.clock = clock
+        self._cleaned = 0.0
+
+    def _db(self):
+        db = store.connect(self._store_name)
+        db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+        db.execute("CREATE TABLE IF NOT EXISTS recent (digest TEXT PRIMARY KEY, expires REAL)")
+        return db
+
+    def _cleanup(self, db, now: float):
+        if now - self._cleaned < CLEANUP_INTERVAL:
+            return
+        self._cleaned = now
+        db.execute("DELETE FROM recent WHERE expires <= ?", (now,))
+        db.execute("DELETE FROM buckets WHERE updated < ?", (now - IDLE_BUCKET,))
+
+    def take(self, key: str, limit: Limit) -> float:
+        """
+        Take a token from the bucket `key`: 0 if there was one, else the seconds until there is.
+        """
+        now = self.clock()
+        db = self._db()
+        self._cleanup(db, now)
+        taken = db.execute(
+            "INSERT INTO buckets (key, tokens, updated) VALUES (:key, :capacity - 1, :now)"
+            " ON CONFLICT (key) DO UPDATE SET"
+            " tokens = MIN(:capacity, tokens + (:now - updated) * :rate) - 1, updated = :now"
+            " WHERE MIN(:capacity, tokens + (:now - updated) * :rate) >= 1",
+            {"key": key, "capacity": limit.capacity, "rate": limit.per_second, "now": now},
+        ).rowcount
+        if taken:
+            return 0.0
+        tokens, updated = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        return max(1e-6, (1 - tokens) / limit.per_second - (now - updated))
+
+    @staticmethod
+    def _digest(parts) -> str:
+        return hashlib.sha1("\0".join(" ".join(part.lower().split()) for part in parts).encode()).hexdigest()
+
+    def reserve(self, *parts: str, ttl: float = DUPLICATE_TTL) -> bool:
+        """
+        Reserve `parts` for `ttl` seconds: False if they are reserved already.
+        """
+        now = self.clock()
+        # a digest that has expired (but was not cleaned up yet) can be reserved again
+        return bool(self._db().execute(
+            "INSERT INTO recent (digest, expires) VALUES (?, ?)"
+            " ON CONFLICT (digest) DO UPDATE SET expires = excluded.expires WHERE recent.expires <= ?",
+            (self._digest(parts), now + ttl, now),
+        ).rowcount)
+
+    def release(self, *parts: str):
+        self._db().execute("DELETE FROM recent WHERE digest = ?", (self._digest(parts),))
+
+    def clear(self):
+        db = self._db()
+        db.execute("DELETE FROM buckets")
+        db.execute("DELETE FROM recent")
+
+
+shared = Admission()
+
+
+def client_ip() -> str:
+    # the router appends the address it got the request from: the last entry is the one not up to the client
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    return forwarded.rsplit(",", 1)[-1].strip() or request.remote_addr or "unknown"
+
+
+def rejected(outcome: str, status: int, message: str = "", retry_after: Optional[float] = None) -> Response:
+    metrics.admission_result("contact", outcome)
+    response = Response(json.dumps(message) + "\n", status, mimetype="application/json")
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response
+
+
+def admit() -> Optional[Response]:
+    """
+    Checks made before the form is parsed: the rejection response, None if the submission may go on.
+    """
+    if request.content_length is None:
+        return rejected("no_length", 411, "Length required")
+    if request.content_length > MAX_BODY:
+        return rejected("too_large", 413, "Message too large")
+    retry_after = shared.take(f"ip:{client_ip()}", PER_IP_LIMIT)
+    if retry_after:
+        return rejected("rate_ip", 429, "Too many messages, please try again later", retry_after)
+    retry_after = shared.take("global", GLOBAL_LIMIT)
+    if retry_after:
+        return rejected("rate_global", 429, "Too many messages, please try again later", retry_after)
+    return None
+
+
+def reserve(*parts: str) -> bool:
+    """
+    Reserve a message before queuing it: False if the same one was queued (or is being) within DUPLICATE_TTL.
+    """
+    return shared.reserve(*parts)
+
+
+def release(*parts: str):
+    """
+    Drop the reservation of a message that could not be queued, so that it can be sent again.
+    """
+    shared.release(*parts)
+
+
+def oversized(form: Mapping[str, str]) -> Optional[Response]:
+    for field, limit in FIELD_LIMITS.items():
+        if len(form.get(field, "")) > limit:
+            return rejected("too_large", 413, f"The {field} is too long")
+    return None
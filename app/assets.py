@@ -0,0 +1,142 @@
+"""
+Content-hashed static asset URLs.
+
+Every file under app/static gets a fingerprinted name (css/style.css ->
+css/style.<hash>.css). Templates resolve logical names with `asset_url()`, and the
+static route serves fingerprinted names with a one-year immutable Cache-Control,
+so repeat visitors never revalidate them.
+
+`flask build-assets` writes the manifest to app/static/build/assets.json; without
+it each file is fingerprinted the first time its URL is asked for (or a
+fingerprinted name of it is requested), so startup reads no static content.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional
+
+import click
+from flask import safe_join, url_for
+
+from app import app, compression
+
+
+MANIFEST_PATH = os.path.join(app.static_folder, "build", "assets.json")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# files whose names already carry their content hash
+CONTENT_ADDRESSED = ("build/img/",)
+# precompressed siblings are served in place of their original (see app/compression.py)
+COMPRESSED = tuple(compression.EXTENSIONS.values())
+# logical name, 10 hex digits, extension
+HASHED = re.compile(r"^(.*)\.([0-9a-f]{10})(\.[^./]+)$")
+
+
+def fingerprint(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:10]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest}{ext}"
+
+
+def fingerprintable(logical: str) -> bool:
+    return logical != "build/assets.json" and not logical.startswith(CONTENT_ADDRESSED) \
+        and not logical.endswith(COMPRESSED)
+
+
+def build(static_folder: str = app.static_folder) -> Dict[str, str]:
+    """
+    Map every static file (relative path) to its fingerprinted name.
+    """
+    manifest = {}
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            logical = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            if fingerprintable(logical):
+                manifest[logical] = hashed_name(logical, fingerprint(path))
+    return manifest
+
+
+def tree_version(static_folder: str = app.static_folder) -> str:
+    """
+    Digest of the names, sizes and mtimes of the static files: changes when they do, without reading them.
+    """
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(static_folder)):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f"{os.path.relpath(os.path.join(root, name), static_folder)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Optional[Dict[str, str]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+BUILT = load_manifest()
+# filled lazily from the static files when there is no built manifest
+MANIFEST: Dict[str, str] = dict(BUILT or {})
+LOGICAL = {hashed: logical for logical, hashed in MANIFEST.items()}
+VERSION = (
+    hashlib.sha1(json.dumps(BUILT, sort_keys=True).encode()).hexdigest()[:12] if BUILT is not None else tree_version()
+)
+
+
+def fingerprinted(name: str) -> Optional[str]:
+    """
+    Fingerprinted name of the static file `name`, None if it has none.
+    """
+    hashed = MANIFEST.get(name)
+    if hashed is None and BUILT is None and fingerprintable(name):
+        path = safe_join(app.static_folder, name)
+        if path is not None and os.path.isfile(path):
+            hashed = hashed_name(name, fingerprint(path))
+            MANIFEST[name], LOGICAL[hashed] = hashed, name
+    return hashed
+
+
+@app.template_global()
+def asset_url(name: str) -> str:
+    """
+    URL of the static file `name`, fingerprinted when it can be.
+    """
+    return url_for("static", filename=fingerprinted(name) or name)
+
+
+def serve_static(filename: str):
+    logical = LOGICAL.get(filename)
+    if logical is None and BUILT is None:
+        # rendered by another worker (or before a restart): check the hash against the file itself
+        match = HASHED.match(filename)
+        if match is not None and fingerprinted(match[1] + match[3]) == filename:
+            logical = match[1] + match[3]
+    response = compression.send_static(logical or filename)
+    if logical is not None or filename.startswith(CONTENT_ADDRESSED):
+        response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+
+app.view_functions["static"] = serve_static
+
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Fingerprint app/static into the asset manifest."""
+    manifest = build()
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    click.echo(f"{len(manifest)} assets in {MANIFEST_PATH}")
@@ -0,0 +1,221 @@
+"""
+Vendor CSS/JS bundles.
+
+`flask build-bundles` concatenates the vendored stylesheets and scripts of the
+landing page into app/static/build/bundle.css and bundle.js, minifying the files
+that are not minified already, with a line-level source map next to each bundle.
+It only reads the vendored copies, so it works offline. The `bundle()` template
+helper emits one tag per bundle (scripts deferred), or the individual files when
+the bundles were never built.
+
+Minification is line preserving (comments, indentation and blank lines go), which
+keeps it safe without a JS parser and makes the source maps exact per line.
+"""
+
+import json
+import os
+import posixpath
+import re
+from typing import Dict, List, Optional, Tuple
+
+import click
+from markupsafe import Markup
+
+from app import app, assets, fonts
+
+
+BUNDLES: Dict[str, List[str]] = {
+    "build/bundle.css": [
+        "vendor/bootstrap/css/bootstrap.min.css",
+        "vendor/icofont/icofont.min.css",
+        "vendor/remixicon/remixicon.css",
+        "vendor/owl.carousel/assets/owl.carousel.min.css",
+        "vendor/boxicons/css/boxicons.min.css",
+        "vendor/venobox/venobox.css",
+        "css/style.css",
+    ],
+    "build/bundle.js": [
+        "vendor/jquery/jquery.min.js",
+        "vendor/bootstrap/js/bootstrap.bundle.min.js",
+        "vendor/jquery.easing/jquery.easing.min.js",
+        "vendor/php-email-form/validate.js",
+        "vendor/waypoints/jquery.waypoints.min.js",
+        "vendor/counterup/counterup.min.js",
+        "vendor/owl.carousel/owl.carousel.min.js",
+        "vendor/isotope-layout/isotope.pkgd.min.js",
+        "vendor/venobox/venobox.min.js",
+        "js/main.js",
+    ],
+}
+
+
+def sources(name: str) -> List[str]:
+    """
+    Files of the bundle `name`, with the trimmed icon font stylesheets when they were built.
+    """
+    return [fonts.TRIMMED.get(source, source) for source in BUNDLES[name]]
+
+
+SOURCE_MAP_COMMENT = re.compile(r"^\s*(//|/\*)# sourceMappingURL=.*$")
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_URL = re.compile(r"""url\(\s*(['"]?)(.*?)\1\s*\)""")
+CSS_CHARSET = re.compile(r"^@charset [^;]+;")
+
+VLQ_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def vlq(value: int) -> str:
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ""
+    while True:
+        digit, value = value & 31, value >> 5
+        encoded += VLQ_CHARS[digit | (32 if value else 0)]
+        if not value:
+            return encoded
+
+
+def rebase_css_urls(css: str, source: str, bundle: str, prefix: Optional[str] = None) -> str:
+    """
+    Rewrite relative url()s of `source` so they resolve from `bundle`, fingerprinted when possible.
+
+    With a `prefix` (e.g. "/static/") the urls become absolute instead.
+    """
+    def rebase(match):
+        quote, url = match.groups()
+        if not url or url.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        path, suffix = re.match(r"([^?#]*)(.*)", url).groups()
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        target = assets.fingerprinted(target) or target
+        if prefix is None:
+            target = posixpath.relpath(target, posixpath.dirname(bundle))
+        else:
+            target = prefix + target
+        return f"url({quote}{target}{suffix}{quote})"
+
+    return CSS_URL.sub(rebase, css)
+
+
+def minify_lines(text: str, kind: str) -> List[Tuple[int, int, str]]:
+    """
+    (source line, source column, text) of every line worth keeping.
+    """
+    if kind == "css":
+        # keep the line count so the map stays exact
+        text = CSS_COMMENT.sub(lambda m: "\n" * m.group(0).count("\n"), text)
+
+    kept, in_comment = [], False
+    for number, line in enumerate(text.splitlines()):
+        column = len(line) - len(line.lstrip())
+        stripped = line.strip()
+        if kind == "js" and not in_comment and stripped.startswith("/*"):
+            in_comment, stripped = True, stripped[2:]
+            column += 2
+        if in_comment:
+            if "*/" not in stripped:
+                continue
+            end = stripped.index("*/") + 2
+            in_comment, rest = False, stripped[end:]
+            column += end + len(rest) - len(rest.lstrip())
+            stripped = rest.strip()
+        if not stripped or (kind == "js" and stripped.startswith("//")):
+            continue
+        kept.append((number, column, stripped))
+    return kept
+
+
+def build_bundle(name: str, sources: List[str], static_folder: str = app.static_folder) -> Tuple[str, dict]:
+    """
+    Concatenate `sources` into the bundle `name`; returns the code and its source map.
+    """
+    kind = os.path.splitext(name)[1][1:]
+    lines: List[str] = []
+    mappings: List[str] = []
+    previous = [0, 0, 0]  # source index, source line, source column
+    for index, source in enumerate(sources):
+        with open(os.path.join(static_folder, source), encoding="utf-8") as f:
+            text = f.read()
+        if kind == "css":
+            text = CSS_CHARSET.sub("", rebase_css_urls(text, source, name))
+
+        if ".min." in source:
+            kept = [(n, 0, line) for n, line in enumerate(text.splitlines()) if line.strip()]
+        else:
+            kept = minify_lines(text, kind)
+
+        for number, column, line in kept:
+            if SOURCE_MAP_COMMENT.match(line):
+                continue
+            lines.append(line)
+            mappings.append(
+                "A" + vlq(index - previous[0]) + vlq(number - previous[1]) + vlq(column - previous[2])
+            )
+            previous = [index, number, column]
+        if kind == "js":
+            # guard against files that rely on automatic semicolon insertion at EOF
+            lines.append(";")
+            mappings.append("")
+
+    map_name = posixpath.basename(name) + ".map"
+    if kind == "css":
+        lines.append(f"/*# sourceMappingURL={map_name} */")
+    else:
+        lines.append(f"//# sourceMappingURL={map_name}")
+
+    source_map = {
+        "version": 3,
+        "file": posixpath.basename(name),
+        "sources": [posixpath.relpath(source, posixpath.dirname(name)) for source in sources],
+        "names": [],
+        "mappings": ";".join(mappings),
+    }
+    return "\n".join(lines) + "\n", source_map
+
+
+def build(static_folder: str = app.static_folder) -> Dict[str, int]:
+    sizes = {}
+    for name in BUNDLES:
+        code, source_map = build_bundle(name, sources(name), static_folder)
+        path = os.path.join(static_folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+        with open(path + ".map", "w", encoding="utf-8") as f:
+            json.dump(source_map, f)
+        sizes[name] = len(code.encode("utf-8"))
+    return sizes
+
+
+BUILT = {name for name in BUNDLES if os.path.exists(os.path.join(app.static_folder, name))}
+
+
+@app.template_global()
+def bundle(name: str, defer: bool = False) -> Markup:
+    """
+    Tags for the bundle `name` ("css" or "js").
+
+    With `defer`, stylesheets are preloaded and applied once loaded instead of blocking rendering.
+    """
+    bundle_name = f"build/bundle.{name}"
+    files = [bundle_name] if bundle_name in BUILT else sources(bundle_name)
+    if name == "js":
+        tag = '<script defer src="%s"></script>'
+    elif defer:
+        tag = (
+            '<link rel="preload" href="%(href)s" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            '<noscript><link href="%(href)s" rel="stylesheet"></noscript>'
+        )
+        return Markup("\n  ".join(Markup(tag) % {"href": assets.asset_url(f)} for f in files))
+    else:
+        tag = '<link href="%s" rel="stylesheet">'
+    return Markup("\n  ".join(Markup(tag) % assets.asset_url(f) for f in files))
+
+
+@app.cli.command("build-bundles")
+def build_bundles_command():
+    """Concatenate and minify the vendor CSS/JS into bundles with source maps."""
+    for name, size in build().items():
+        files = sources(name)
+        before = sum(os.path.getsize(os.path.join(app.static_folder, f)) for f in files)
+        click.echo(f"{name}: {len(files)} files, {before} -> {size} bytes")
+    click.echo("Run `flask build-assets` again to fingerprint the new bundles.")
@@ -0,0 +1,124 @@
+"""
+Precompressed responses.
+
+`flask build-compressed` writes .br and .gz siblings next to every text file
+under app/static (css/style.css -> css/style.css.br, css/style.css.gz), and the
+static route serves the best one the client accepts, by `Accept-Encoding`.
+Rendered pages are compressed on the fly by the page cache, which keeps the
+compressed bytes too.
+
+Brotli is optional: without the `brotli` package only gzip is offered.
+"""
+
+import gzip
+import mimetypes
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import click
+from flask import request, send_from_directory
+
+from app import app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# preference order: brotli is ~15-20% smaller than gzip on this site's CSS/JS
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli else ("gzip",)
+EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE = (".css", ".js", ".map", ".json", ".svg", ".html", ".txt", ".xml", ".ttf", ".eot")
+# below this the saving does not pay for the extra round of decoding
+MIN_SIZE = 1024
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def negotiate(available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """
+    The preferred encoding of `available` the current request accepts, None for identity.
+    """
+    accepted = request.accept_encodings
+    for encoding in ENCODINGS:
+        if encoding in available and accepted[encoding]:
+            return encoding
+    return None
+
+
+def build(static_folder: str = app.static_folder) -> Dict[str, int]:
+    """
+    Write the compressed siblings of every text file that changed; returns total bytes before/after.
+    """
+    totals = {"files": 0, "bytes": 0, **{encoding: 0 for encoding in ENCODINGS}}
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if not name.endswith(COMPRESSIBLE) or os.path.getsize(path) < MIN_SIZE:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            totals["files"] += 1
+            totals["bytes"] += len(data)
+            for encoding in ENCODINGS:
+                target = path + EXTENSIONS[encoding]
+                if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(path):
+                    compressed = compress(data, encoding)
+                    if len(compressed) >= len(data):
+                        if os.path.exists(target):
+                            os.remove(target)
+                        continue
+                    with open(target, "wb") as f:
+                        f.write(compressed)
+                totals[encoding] += os.path.getsize(target)
+    return totals
+
+
+def scan(static_folder: str = app.static_folder) -> Dict[str, Tuple[str, ...]]:
+    """
+    Map every static file (relative path) with compressed siblings to their encodings.
+    """
+    precompressed = {}
+    for root, _, files in os.walk(static_folder):
+        names = set(files)
+        for name in files:
+            encodings = tuple(e for e in ENCODINGS if name + EXTENSIONS[e] in names)
+            if encodings:
+                logical = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, "/")
+                precompressed[logical] = encodings
+    return precompressed
+
+
+PRECOMPRESSED = scan()
+
+
+def send_static(filename: str, static_folder: str = app.static_folder, precompressed=None):
+    """
+    Send app/static/<filename>, or its precompressed sibling when the client accepts it.
+    """
+    encodings = (PRECOMPRESSED if precompressed is None else precompressed).get(filename)
+    if not encodings:
+        return send_from_directory(static_folder, filename)
+
+    encoding = negotiate(encodings)
+    if encoding is None:
+        response = send_from_directory(static_folder, filename)
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_from_directory(static_folder, filename + EXTENSIONS[encoding], mimetype=mimetype)
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@app.cli.command("build-compressed")
+def build_compressed_command():
+    """Write brotli/gzip siblings of the static text files."""
+    totals = build()
+    sizes = ", ".join(f"{encoding} {totals[encoding]}" for encoding in ENCODINGS)
+    click.echo(f"{totals['files']} files, {totals['bytes']} bytes -> {sizes} bytes")
@@ -0,0 +1,33 @@
+"""
+Per-currency balance totals.
+
+The balance points are summed as they are pulled from the iterators, into one
+Decimal accumulator per currency, so no intermediate table is built and the
+totals are exact whatever the number of points.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, Mapping
+
+
+def to_decimal(value) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        # the shortest repr, i.e. the number as it was written, not its binary expansion
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+def total_by_currency(points: Iterable[Mapping]) -> Dict[str, Decimal]:
+    """
+    Sum the 'balance' of `points` by 'base_ccy'.
+    """
+    totals: Dict[str, Decimal] = {}
+    for point in points:
+        balance = point['balance']
+        if balance is None:
+            continue
+        ccy = point['base_ccy']
+        totals[ccy] = totals.get(ccy, Decimal(0)) + to_decimal(balance)
+    return totals
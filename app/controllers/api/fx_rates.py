@@ -0,0 +1,108 @@
+"""
+Date-indexed FX rates for converting balance totals into one currency.
+
+The rates come from a CSV with a `date,ccy,rate` header, one row per currency and
+day, `rate` being the value of one unit of `ccy` in the pivot currency (USD by
+default; the pivot itself is 1). The table is loaded once per worker into one
+forward-filled row per date, found by binary search: the rate of a day is the
+last one published on or before it, so weekends and holidays fall back to the
+previous fixing, and all the currencies of a conversion come from a single row.
+Past the last date of the file, rates are only carried forward MAX_GAP days (a
+weekend and a holiday); days after that date are provisional, as a later
+fixing may still change their rates. Amounts and rates stay Decimal, like the
+totals they convert.
+"""
+
+import csv
+import hashlib
+import operator
+import os
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Mapping, Optional, Tuple
+
+RATES_CSV = os.environ.get('BALANCE_FX_RATES_CSV')
+PIVOT = os.environ.get('BALANCE_FX_PIVOT', 'USD')
+PRECISION = Decimal('0.00000001')
+MAX_GAP = int(os.environ.get('BALANCE_FX_MAX_GAP_DAYS', '4'))
+
+
+class MissingRate(LookupError):
+    pass
+
+
+class RateTable:
+    """
+    Rates by day, forward-filled: row i holds the latest rate of every currency on or before dates[i].
+    """
+
+    def __init__(self, rates: Mapping[str, Mapping[str, Decimal]], pivot: str = PIVOT, max_gap: int = MAX_GAP):
+        self.pivot = pivot
+        self.max_gap = max_gap
+        self.dates: List[str] = sorted({day for points in rates.values() for day in points})
+        self.columns: Dict[str, int] = {ccy: i for i, ccy in enumerate(sorted(rates))}
+        self.rows: List[Tuple[Optional[Decimal], ...]] = []
+        row: List[Optional[Decimal]] = [None] * len(self.columns)
+        for day in self.dates:
+            for ccy, column in self.columns.items():
+                row[column] = rates[ccy].get(day, row[column])
+            self.rows.append(tuple(row))
+        # changes with any rate, e.g. to tell the ETags of converted totals apart
+        self.version = hashlib.sha1(repr((pivot, self.dates, sorted(self.columns), self.rows)).encode()).hexdigest()[:12]
+
+    @classmethod
+    def from_csv(cls, path: str, pivot: str = PIVOT) -> 'RateTable':
+        rates: Dict[str, Dict[str, Decimal]] = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                rates.setdefault(row['ccy'].strip().upper(), {})[row['date'].strip()[:10]] = Decimal(row['rate'])
+        rates.pop(pivot, None)
+        return cls(rates, pivot)
+
+    @property
+    def currencies(self):
+        return {self.pivot, *self.columns}
+
+    def provisional(self, day: str) -> bool:
+        """
+        Whether the rates of `day` are carried forward past the last date of the table.
+        """
+        return not self.dates or day > self.dates[-1]
+
+    def row(self, day: str) -> Tuple[Optional[Decimal], ...]:
+        index = bisect_right(self.dates, day) - 1
+        if index < 0:
+            raise MissingRate(f"No rates on or before {day}")
+        last = self.dates[-1]
+        if day > last and date.fromisoformat(day) - date.fromisoformat(last) > timedelta(days=self.max_gap):
+            raise MissingRate(f"No rates for {day}, the latest are of {last}")
+        return self.rows[index]
+
+    def rate(self, ccy: str, day: str, row: Optional[Tuple[Optional[Decimal], ...]] = None) -> Decimal:
+        """
+        Value of one `ccy` in the pivot currency on `day` (YYYY-MM-DD).
+        """
+        if ccy == self.pivot:
+            return Decimal(1)
+        column = self.columns.get(ccy)
+        rate = None if column is None else (row or self.row(day))[column]
+        if rate is None:
+            raise MissingRate(f"No {ccy} rate on or before {day}")
+        return rate
+
+    def convert(self, totals: Mapping[str, Decimal], target: str, day: str) -> Tuple[Decimal, Dict[str, Decimal]]:
+        """
+        Sum of `totals` in `target` on `day`, and the rate applied to each currency.
+        """
+        row = self.row(day)     # one search for all the currencies
+        target_rate = self.rate(target, day, row)
+        factors = {ccy: self.rate(ccy, day, row) / target_rate for ccy in totals}
+        total = sum(map(operator.mul, totals.values(), factors.values()), Decimal(0))
+        return total.quantize(PRECISION), factors
+
+
+def load(path: Optional[str] = RATES_CSV) -> Optional[RateTable]:
+    if not path or not os.path.exists(path):
+        return None
+    return RateTable.from_csv(path)
@@ -0,0 +1,66 @@
+"""
+Parsing of the <moment> of the balance endpoints.
+
+The inputs are nearly always 'now', 'today' or an ISO-8601 date/datetime, so
+dateutil (slow, but lenient) is only the last resort: keywords first, then a
+regex for the ISO extended and basic forms, then dateutil. Results are cached
+by raw string; the key includes today's date because dateutil fills missing
+fields from today, and 'now'/'today' are never cached.
+
+The timezone of the input is dropped, not converted: '2019-06-26T23:00:00-05:00'
+is June 26, like before.
+"""
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+from dateutil import parser
+
+KEYWORDS = {
+    'now': datetime.now,
+    'today': datetime.now,
+}
+
+ISO = re.compile(
+    r'^(\d{4})(-?)(\d{2})\2(\d{2})'                               # date, extended or basic
+    r'(?:[T ](\d{2})(?::?(\d{2})(?::?(\d{2})(?:[.,]\d+)?)?)?)?'   # time
+    r'(?:Z|[+-]\d{2}(?::?\d{2})?)?$'                              # offset
+)
+
+CACHE_SIZE = 1024
+
+
+def snap(moment: datetime) -> str:
+    # every balance is taken at 22:00 of its day
+    return str(moment.replace(tzinfo=None, hour=22, minute=0, second=0, microsecond=0))
+
+
+def parse_iso(moment: str):
+    """
+    The datetime of an ISO-8601 `moment`, None if it is not one this fast path handles.
+    """
+    match = ISO.match(moment)
+    if match is None:
+        return None
+    year, _, month, day, hour, minute, second = match.groups()
+    try:
+        return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        # out of range: let dateutil decide (and raise)
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_cached(moment: str, today: date) -> str:
+    parsed = parse_iso(moment)
+    if parsed is None:
+        parsed = parser.parse(moment)
+    return snap(parsed)
+
+
+def parse_moment(moment: str) -> str:
+    keyword = KEYWORDS.get(moment)
+    if keyword is not None:
+        return snap(keyword())
+    return _parse_cached(moment, date.today())
@@ -1,75 +1,202 @@
-import json
+import hashlib
 import logging
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Dict, Union
+from typing import Dict, Iterator, Optional
 
 import flask
-import pandas as pd
-from dateutil import parser
 from flask import Flask
 from flask_restful import Api, Resource, abort
 
+from bluebear.app_pkg import metrics
+from bluebear.app_pkg.controllers.api import fx_rates, moments
+from bluebear.app_pkg.controllers.api.aggregation import total_by_currency
+from bluebear.app_pkg.controllers.api.client_pool import ClientPool, influx_ping
+from bluebear.app_pkg.controllers.api.fx_rates import MissingRate
+from bluebear.app_pkg.controllers.api.serializers import dumps, output_json
+from bluebear.app_pkg.controllers.api.snapshots import SnapshotCache, is_final
 from bluebear.config import BALANCE_TRACER_INFLUXDB_CONNECTION_STRING
 from bluebear.script.queryman import Queryman
 
 logger = logging.getLogger(__name__)
 
+snapshot_cache = SnapshotCache()
+
+# bump to invalidate the ETags handed out for past days (e.g. after a backfill)
+DATA_VERSION = os.getenv('BALANCE_DATA_VERSION', '1')
+FINAL_CACHE_CONTROL = 'public, max-age=2592000'
+
+queryman_pool = ClientPool(
+    lambda: Queryman(os.getenv(BALANCE_TRACER_INFLUXDB_CONNECTION_STRING)),
+    health_check=lambda _: influx_ping(os.getenv(BALANCE_TRACER_INFLUXDB_CONNECTION_STRING)),
+)
+
+# loaded at import, so a preloading server shares it with all its workers
+fx_table = fx_rates.load()
+
+
+class RangeTooCold(Exception):
+    pass
+
+
+def reporting_currency() -> Optional[str]:
+    """
+    The currency of ?in=<ccy>, None without it; aborts with 400 if totals cannot be converted to it.
+    """
+    target = flask.request.args.get('in')
+    if not target:
+        return None
+    target = target.upper()
+    if fx_table is None:
+        abort(http_status_code=400, message="Currency conversion is not configured")
+    if target not in fx_table.currencies:
+        abort(http_status_code=400, message=f"No FX rates for {target}")
+    return target
+
+
+def convert(as_of_utc: str, balance: Dict[str, Decimal], target: str) -> dict:
+    total, rates = fx_table.convert(balance, target, as_of_utc[:10])
+    return {'as_of_utc': as_of_utc, 'balance': {target: total}, 'fx_rates': rates}
+
 
 class TotalBalanceAsOfDate(Resource):
 
     @staticmethod
     def parse_moment(moment: str) -> str:
-        if moment in ['now', 'today']:
-            as_of_utc = datetime.now()
-        else:
-            as_of_utc = parser.parse(moment).replace(tzinfo=None)
-
-        return str(as_of_utc.replace(tzinfo=None).replace(hour=22, minute=0, second=0, microsecond=0))
+        # keywords, ISO fast path, then dateutil, behind a cache (see moments.py)
+        return moments.parse_moment(moment)
 
     @staticmethod
-    def balances_to_map(balances) -> Dict[str, Union[str, Dict[str, Decimal]]]:
+    def balances_to_map(balances) -> Dict[str, Decimal]:
+
+        # the first point of every series, summed by currency as they come
+        return total_by_currency(next(bp) for _, bp in balances.items())
 
-        df = pd.DataFrame([next(bp) for _, bp in balances.items()])
-        df = df.groupby('base_ccy').agg({'balance': {'total_amount': sum}})['balance']
+    @staticmethod
+    def load_balance(as_of_utc: str) -> Dict[str, Decimal]:
+        # the balance iterators read through the client: consume them before giving it back
+        with metrics.timed('backend'), queryman_pool.client() as queryman:
+            return TotalBalanceAsOfDate.balances_to_map(queryman.get_balances(as_of_utc))
 
-        # return the result
-        return {ccy: amounts['total_amount'] for (ccy, amounts) in df.iterrows()}
+    @staticmethod
+    def etag(as_of_utc: str, target: Optional[str] = None) -> str:
+        # one per representation: the query string (e.g. ?pretty=1) changes the body, and so do the rates
+        key = f"{as_of_utc}|{DATA_VERSION}|{flask.request.query_string.decode()}"
+        if target is not None:
+            key += f"|{fx_table.version}"
+        return hashlib.sha1(key.encode()).hexdigest()
 
     @staticmethod
     def get(moment: str):
 
+        target = reporting_currency()
+
         try:
             # parse the parameter
             as_of_utc = TotalBalanceAsOfDate.parse_moment(moment=moment)
 
-            # load the data
-            queryman = Queryman(os.getenv(BALANCE_TRACER_INFLUXDB_CONNECTION_STRING))
-            balances = queryman.get_balances(as_of_utc)
-
-            # massage the data and convert it into a JSON-serializable object
-            json_data = {
+            # a past day never changes, unless converted at rates carried past the table: answer pollers
+            # before touching the backend
+            headers = {}
+            if is_final(as_of_utc, time.time()) and not (target and fx_table.provisional(as_of_utc[:10])):
+                etag = TotalBalanceAsOfDate.etag(as_of_utc, target)
+                headers = {'ETag': f'"{etag}"', 'Cache-Control': FINAL_CACHE_CONTROL}
+                if flask.request.if_none_match.contains(etag):
+                    return flask.Response(status=304, headers=headers)
+
+            # load the data, at most once per as-of day and TTL (see snapshots.py)
+            balance = snapshot_cache.get(as_of_utc, lambda: TotalBalanceAsOfDate.load_balance(as_of_utc))
+
+            # serialized by output_json (see serializers.py)
+            if target is not None:
+                return convert(as_of_utc, balance, target), 200, headers
+            return {
                 'as_of_utc': as_of_utc,
-                'balance': TotalBalanceAsOfDate.balances_to_map(balances),
-            }
+                'balance': balance,
+            }, 200, headers
 
-            response = flask.make_response(json.dumps(json_data, indent=2, default=str))
-            response.headers['content-type'] = 'application/json'
-
-            return response
+        except MissingRate as error:
+            abort(http_status_code=400, message=str(error))
 
         except Exception as error:
             logger.fatal(f"Error processing data from the influxDb: {error}")
             abort(
                 http_status_code=500,
-                message=error,
+                message=str(error),
             )
 
 
+class TotalBalanceRange(Resource):
+    """
+    Daily totals from `start` to `end` (both included), streamed as one JSON object per line.
+    """
+
+    MAX_DAYS = 3660
+    # days not in the snapshot cache one request may query, one after the other
+    MAX_BACKEND_DAYS = int(os.getenv('BALANCE_RANGE_MAX_BACKEND_DAYS', '92'))
+
+    @staticmethod
+    def as_of_days(start: str, end: str) -> Iterator[str]:
+        day, last = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        while day <= last:
+            yield str(day)
+            day += timedelta(days=1)
+
+    @staticmethod
+    def lines(start: str, end: str, target: Optional[str] = None) -> Iterator[bytes]:
+        queried = 0
+
+        def load(as_of_utc):
+            # a pooled client per day, so a long range (or a slow reader) does not keep one from the other requests
+            nonlocal queried
+            queried += 1
+            if queried > TotalBalanceRange.MAX_BACKEND_DAYS:
+                raise RangeTooCold(
+                    f"More than {TotalBalanceRange.MAX_BACKEND_DAYS} days to load, "
+                    f"request the range from {as_of_utc[:10]} again"
+                )
+            return TotalBalanceAsOfDate.load_balance(as_of_utc)
+
+        for as_of_utc in TotalBalanceRange.as_of_days(start, end):
+            try:
+                balance = snapshot_cache.get(as_of_utc, lambda: load(as_of_utc))
+                line = convert(as_of_utc, balance, target) if target else {'as_of_utc': as_of_utc, 'balance': balance}
+            except Exception as error:
+                # the status line is gone already: report it in the stream and stop
+                logger.fatal(f"Error processing data from the influxDb: {error}")
+                yield dumps({'as_of_utc': as_of_utc, 'error': str(error)}) + b'\n'
+                return
+            yield dumps(line) + b'\n'
+
+    @staticmethod
+    def get(start: str, end: str):
+
+        target = reporting_currency()
+
+        try:
+            start_utc = TotalBalanceAsOfDate.parse_moment(moment=start)
+            end_utc = TotalBalanceAsOfDate.parse_moment(moment=end)
+        except (ValueError, OverflowError) as error:
+            abort(http_status_code=400, message=str(error))
+
+        days = (datetime.fromisoformat(end_utc) - datetime.fromisoformat(start_utc)).days + 1
+        if not 0 < days <= TotalBalanceRange.MAX_DAYS:
+            abort(http_status_code=400, message=f"The range must span 1 to {TotalBalanceRange.MAX_DAYS} days")
+
+        return flask.Response(
+            flask.stream_with_context(TotalBalanceRange.lines(start_utc, end_utc, target)),
+            mimetype='application/x-ndjson',
+        )
+
+
 def register_rest(bb_app):
+    metrics.init_app(bb_app)
     rest_api = Api(bb_app)
+    rest_api.representations['application/json'] = output_json
     rest_api.add_resource(TotalBalanceAsOfDate, '/total_balance_as_of_date/<string:moment>')
+    rest_api.add_resource(TotalBalanceRange, '/total_balance_range/<string:start>/<string:end>')
 
     return bb_app
 
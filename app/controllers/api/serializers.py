@@ -0,0 +1,56 @@
+"""
+JSON output of the REST resources.
+
+`output_json` is registered as the flask_restful representation of
+application/json, so resources just return dicts. Output is compact unless the
+request asks for `?pretty=1`. Decimals are written as strings (exact, as before)
+and datetimes/dates in their str() form, by type rather than by calling str() on
+whatever is left. orjson is used when it is installed, the standard library
+otherwise; both give equivalent documents.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import flask
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data, pretty: bool = False) -> bytes:
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=options)
+    if pretty:
+        return json.dumps(data, default=default, indent=2, ensure_ascii=False).encode()
+    return json.dumps(data, default=default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def wants_pretty() -> bool:
+    return flask.request.args.get('pretty', '') not in ('', '0', 'false')
+
+
+def output_json(data, code, headers=None):
+    """
+    flask_restful representation for application/json.
+    """
+    response = flask.make_response(dumps(data, pretty=wants_pretty()) + b'\n', code)
+    response.headers.extend(headers or {})
+    response.headers['Content-Type'] = 'application/json'
+    return response
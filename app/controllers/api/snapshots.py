@@ -0,0 +1,160 @@
+"""
+Cache of balance snapshots by normalized as-of timestamp.
+
+parse_moment() snaps every request to 22:00 of a day, so the totals of a day are
+one entry. Past days never change and are kept until evicted; today's entry
+expires after TODAY_TTL seconds. Entries live in a per-worker LRU bounded in
+bytes, backed by a SQLite file of the local store (app/store.py) shared by the
+workers of the host, and concurrent misses for the same day (e.g. /now and
+/today) wait for a single query.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, Optional, Tuple
+
+from bluebear.app_pkg import metrics, store
+
+Balances = Dict[str, Decimal]
+
+# a file of the store's runtime dir, or an absolute path
+STORE_NAME = os.environ.get('BALANCE_SNAPSHOT_STORE') or 'snapshots.sqlite3'
+TODAY_TTL = 60
+MEMORY_BUDGET = 4 << 20     # bytes of encoded snapshots kept by each worker
+STORE_BUDGET = 64 << 20     # bytes kept in the shared store, oldest written go first
+
+
+def is_final(as_of: str, now: float) -> bool:
+    """
+    Whether the totals as of `as_of` can no longer change: past days are final, today's can still move.
+    """
+    return as_of[:10] < date.fromtimestamp(now).isoformat()
+
+
+def encode(balances: Balances) -> bytes:
+    return json.dumps({ccy: str(amount) for ccy, amount in balances.items()}, separators=(',', ':')).encode()
+
+
+def decode(body: bytes) -> Balances:
+    return {ccy: Decimal(amount) for ccy, amount in json.loads(body).items()}
+
+
+class SnapshotCache:
+
+    def __init__(self, store_name: Optional[str] = STORE_NAME, memory_budget: int = MEMORY_BUDGET,
+                 store_budget: int = STORE_BUDGET, today_ttl: float = TODAY_TTL, clock: Callable[[], float] = time.time):
+        self.store_name = store_name
+        self.memory_budget = memory_budget
+        self.store_budget = store_budget
+        self.today_ttl = today_ttl
+        self.clock = clock
+        # as_of -> (encoded snapshot, expiry or None)
+        self._entries: 'OrderedDict[str, Tuple[bytes, Optional[float]]]' = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.store_name is None:
+            return None
+        db = store.connect(self.store_name)
+        db.execute('CREATE TABLE IF NOT EXISTS snapshots (as_of TEXT PRIMARY KEY, body BLOB, expires REAL, written REAL)')
+        return db
+
+    def _expiry(self, as_of: str) -> Optional[float]:
+        return None if is_final(as_of, self.clock()) else self.clock() + self.today_ttl
+
+    def _remember(self, as_of: str, body: bytes, expires: Optional[float]):
+        with self._lock:
+            previous = self._entries.pop(as_of, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[as_of] = (body, expires)
+            self._size += len(body)
+            while self._size > self.memory_budget and len(self._entries) > 1:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _cached(self, as_of: str) -> Optional[bytes]:
+        entry = self._entries.get(as_of)
+        if entry is None:
+            return None
+        body, expires = entry
+        if expires is not None and expires <= self.clock():
+            return None
+        self._entries.move_to_end(as_of)
+        return body
+
+    def _load_stored(self, as_of: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        db = self._db()
+        if db is None:
+            return None
+        row = db.execute('SELECT body, expires FROM snapshots WHERE as_of = ?', (as_of,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= self.clock()):
+            return None
+        return bytes(row[0]), row[1]
+
+    def _store(self, as_of: str, body: bytes, expires: Optional[float]):
+        db = self._db()
+        if db is None:
+            return
+        db.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)', (as_of, body, expires, self.clock()))
+        total = db.execute('SELECT COALESCE(SUM(LENGTH(body)), 0) FROM snapshots').fetchone()[0]
+        if total > self.store_budget:
+            db.execute(
+                'DELETE FROM snapshots WHERE as_of IN (SELECT as_of FROM snapshots ORDER BY written LIMIT '
+                '(SELECT COUNT(*) / 4 + 1 FROM snapshots)) AND as_of != ?',
+                (as_of,),
+            )
+
+    def get(self, as_of: str, load: Callable[[], Balances]) -> Balances:
+        """
+        The snapshot for `as_of`, calling `load` (once, whatever the concurrency) on a miss.
+        """
+        with self._lock:
+            body = self._cached(as_of)
+            if body is None:
+                future = self._inflight.get(as_of)
+                leader = future is None
+                if leader:
+                    future = self._inflight[as_of] = Future()
+        if body is not None:
+            metrics.cache_result('snapshots', 'hit')
+            return decode(body)
+        if not leader:
+            metrics.cache_result('snapshots', 'wait')
+            return decode(future.result())
+
+        try:
+            stored = self._load_stored(as_of)
+            if stored is not None:
+                metrics.cache_result('snapshots', 'store')
+                body, expires = stored
+            else:
+                metrics.cache_result('snapshots', 'miss')
+                body, expires = encode(load()), self._expiry(as_of)
+                self._store(as_of, body, expires)
+            self._remember(as_of, body, expires)
+            future.set_result(body)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[as_of]
+        return decode(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        db = self._db()
+        if db is not None:
+            db.execute('DELETE FROM snapshots')
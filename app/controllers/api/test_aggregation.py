@@ -0,0 +1,24 @@
+import unittest
+from decimal import Decimal
+
+from bluebear.app_pkg.controllers.api.aggregation import total_by_currency
+
+
+class TestAggregation(unittest.TestCase):
+
+    POINTS = [
+        {'base_ccy': 'EUR', 'balance': 0.1},
+        {'base_ccy': 'EUR', 'balance': 0.2},
+        {'base_ccy': 'USD', 'balance': Decimal('1.005')},
+        {'base_ccy': 'USD', 'balance': 2},
+        {'base_ccy': 'JPY', 'balance': None},
+    ]
+
+    def test_decimal_sum(self):
+        totals = total_by_currency(iter(self.POINTS))
+        self.assertEqual(totals, {'EUR': Decimal('0.3'), 'USD': Decimal('3.005')})
+
+    def test_exact_whatever_the_size(self):
+        self.assertEqual(total_by_currency([{'base_ccy': 'EUR', 'balance': 0.1}] * 6000), {'EUR': Decimal('600.0')})
+        big = [{'base_ccy': 'JPY', 'balance': 2 ** 62}] * 4
+        self.assertEqual(total_by_currency(iter(big)), {'JPY': Decimal(2 ** 64)})
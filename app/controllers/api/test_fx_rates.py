@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from bluebear.app_pkg.controllers.api.fx_rates import MissingRate, RateTable, load
+
+RATES = """date,ccy,rate
+2021-03-01,EUR,1.20
+2021-03-01,GBP,1.40
+2021-03-02,EUR,1.21
+2021-03-05,EUR,1.25
+2021-03-05,CHF,1.08
+"""
+
+
+class TestRateTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'rates.csv')
+        with open(self.path, 'w') as f:
+            f.write(RATES)
+        self.table = load(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_latest_rate_on_or_before_the_day(self):
+        self.assertEqual(self.table.rate('EUR', '2021-03-01'), Decimal('1.20'))
+        self.assertEqual(self.table.rate('EUR', '2021-03-04'), Decimal('1.21'))
+        self.assertEqual(self.table.rate('EUR', '2021-03-09'), Decimal('1.25'))
+        # forward-filled across the days other currencies were published
+        self.assertEqual(self.table.rate('GBP', '2021-03-05'), Decimal('1.40'))
+        self.assertEqual(self.table.rate('USD', '1999-01-01'), Decimal(1))
+
+    def test_missing_rates(self):
+        with self.assertRaises(MissingRate):
+            self.table.rate('EUR', '2021-02-28')
+        with self.assertRaises(MissingRate):
+            self.table.rate('CHF', '2021-03-04')
+        with self.assertRaises(MissingRate):
+            self.table.rate('JPY', '2021-03-04')
+        # not carried forward more than MAX_GAP days past the file
+        with self.assertRaises(MissingRate):
+            self.table.rate('EUR', '2021-03-10')
+        with self.assertRaises(MissingRate):
+            self.table.convert({'EUR': Decimal(1)}, 'USD', '2021-04-01')
+
+    def test_provisional_and_version(self):
+        self.assertFalse(self.table.provisional('2021-03-05'))
+        self.assertTrue(self.table.provisional('2021-03-06'))
+        fixed = RateTable({'EUR': {'2021-03-05': Decimal('1.26')}})
+        self.assertNotEqual(fixed.version, self.table.version)
+        self.assertEqual(fixed.version, RateTable({'EUR': {'2021-03-05': Decimal('1.26')}}).version)
+
+    def test_convert(self):
+        totals = {'EUR': Decimal('100'), 'GBP': Decimal('10'), 'USD': Decimal('1')}
+        total, rates = self.table.convert(totals, 'USD', '2021-03-03')
+        self.assertEqual(total, Decimal('136.00000000'))
+        self.assertEqual(rates['EUR'], Decimal('1.21'))
+
+        total, rates = self.table.convert({'EUR': Decimal('121')}, 'GBP', '2021-03-03')
+        self.assertEqual(total, Decimal('104.57857143'))
+        self.assertEqual(self.table.convert({}, 'EUR', '2021-03-03')[0], Decimal(0))
+
+    def test_not_configured(self):
+        self.assertIsNone(load(None))
+        self.assertIsNone(load(os.path.join(self.tmp.name, 'missing.csv')))
+        self.assertEqual(self.table.currencies, {'USD', 'EUR', 'GBP', 'CHF'})
+        self.assertIsInstance(self.table, RateTable)
@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from dateutil import parser
+
+from bluebear.app_pkg.controllers.api import moments
+
+
+class TestMoments(unittest.TestCase):
+
+    INPUTS = [
+        '2019-06-26', '20190626', '2019-06-26T04:42:24', '2019-06-26T04:42:24+00:00', '2019-06-26T04:42:24Z',
+        '20190626T044224Z', '2019-06-26 23:59:59.123456-05:00', '2019-06-26T04:42', '2019-06-26T04:42:24+0900',
+    ]
+
+    def setUp(self):
+        moments._parse_cached.cache_clear()
+
+    def test_fast_path_agrees_with_dateutil(self):
+        for moment in self.INPUTS:
+            self.assertIsNotNone(moments.parse_iso(moment), moment)
+            self.assertEqual(moments.parse_moment(moment), moments.snap(parser.parse(moment)), moment)
+
+    def test_fallback_to_dateutil(self):
+        for moment in ('2019 - 06 - 26', 'June 26 2019', '2019-06-26T25:00:00'):
+            self.assertIsNone(moments.parse_iso(moment), moment)
+        self.assertEqual(moments.parse_moment('June 26 2019'), '2019-06-26 22:00:00')
+        with self.assertRaises(ValueError):
+            moments.parse_moment('2019-02-30')
+
+    def test_cache(self):
+        with mock.patch.object(moments.parser, 'parse', wraps=parser.parse) as parse:
+            moments.parse_moment('2019 - 06 - 26')
+            moments.parse_moment('2019 - 06 - 26')
+        self.assertEqual(parse.call_count, 1)
+
+        moments.parse_moment('now')
+        moments.parse_moment('today')
+        self.assertEqual(moments._parse_cached.cache_info().currsize, 1)
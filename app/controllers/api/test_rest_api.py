@@ -1,7 +1,16 @@
+import json
 import unittest
 from datetime import datetime
+from decimal import Decimal
+from unittest import mock
 
+from flask import Flask
+
+from bluebear.app_pkg.controllers.api import rest_api
+from bluebear.app_pkg.controllers.api.client_pool import ClientPool
+from bluebear.app_pkg.controllers.api.fx_rates import RateTable
 from bluebear.app_pkg.controllers.api.rest_api import TotalBalanceAsOfDate
+from bluebear.app_pkg.controllers.api.snapshots import SnapshotCache
 
 
 class TestRestApi(unittest.TestCase):
@@ -39,3 +48,138 @@ class TestRestApi(unittest.TestCase):
         self.assertEqual(balances['cc1'], 10)
         self.assertEqual(balances['cc2'], 41)
         self.assertEqual(balances['cc3'], 30)
+
+
+class FakeQueryman:
+
+    def __init__(self):
+        self.queries = []
+
+    def get_balances(self, as_of_utc):
+        self.queries.append(as_of_utc)
+        day = int(as_of_utc[8:10])
+        return {
+            1.0: iter([{'base_ccy': 'EUR', 'balance': day}]),
+            2.0: iter([{'base_ccy': 'EUR', 'balance': 1}, {'base_ccy': 'EUR', 'balance': 1000}]),
+        }
+
+
+class ApiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.queryman = FakeQueryman()
+        patches = [
+            mock.patch.object(rest_api, 'queryman_pool', ClientPool(lambda: self.queryman)),
+            mock.patch.object(rest_api, 'snapshot_cache', SnapshotCache(store_name=None)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = rest_api.register_rest(Flask(__name__)).test_client()
+
+
+class TestTotalBalanceRange(ApiTestCase):
+
+    def test_streams_one_line_per_day(self):
+        response = self.client.get('/total_balance_range/2019-06-29/2019-07-02')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual([line['as_of_utc'] for line in lines], [
+            '2019-06-29 22:00:00', '2019-06-30 22:00:00', '2019-07-01 22:00:00', '2019-07-02 22:00:00',
+        ])
+        self.assertEqual(lines[0]['balance'], {'EUR': '30'})
+
+        # cached days do not reach the backend again
+        self.client.get('/total_balance_range/2019-07-01/2019-07-03').get_data()
+        self.assertEqual(len(self.queryman.queries), 5)
+
+    def test_backend_error_drops_the_client(self):
+        with mock.patch.object(self.queryman, 'get_balances', side_effect=ConnectionResetError('reset')):
+            lines = self.client.get('/total_balance_range/2019-06-29/2019-07-02').data.decode().splitlines()
+        self.assertEqual(json.loads(lines[-1])['error'], 'reset')
+        self.assertEqual(rest_api.queryman_pool.stats(), {'size': 4, 'created': 0, 'idle': 0})
+
+    def test_days_loaded_per_request_are_capped(self):
+        with mock.patch.object(rest_api.TotalBalanceRange, 'MAX_BACKEND_DAYS', 2):
+            response = self.client.get('/total_balance_range/2019-06-29/2019-07-02')
+            lines = [json.loads(line) for line in response.data.decode().splitlines()]
+            self.assertEqual(len(lines), 3)
+            self.assertEqual(lines[-1]['as_of_utc'], '2019-07-01 22:00:00')
+            self.assertIn('error', lines[-1])
+            self.assertEqual(len(self.queryman.queries), 2)
+
+            # the days loaded are cached: asking again goes on from there
+            lines = self.client.get('/total_balance_range/2019-06-29/2019-07-02').data.decode().splitlines()
+            self.assertEqual(len(lines), 4)
+            self.assertNotIn('error', json.loads(lines[-1]))
+
+    def test_bad_ranges(self):
+        self.assertEqual(self.client.get('/total_balance_range/2019-07-02/2019-07-01').status_code, 400)
+        self.assertEqual(self.client.get('/total_balance_range/2000-01-01/2019-07-01').status_code, 400)
+        self.assertEqual(self.client.get('/total_balance_range/nope/2019-07-01').status_code, 400)
+
+
+class TestConditionalRequests(ApiTestCase):
+
+    def test_past_day_revalidates_without_query(self):
+        first = self.client.get('/total_balance_as_of_date/2019-06-26')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(json.loads(first.data)['balance'], {'EUR': '27'})
+        self.assertEqual(first.headers['Cache-Control'], rest_api.FINAL_CACHE_CONTROL)
+
+        again = self.client.get('/total_balance_as_of_date/2019-06-26', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(len(self.queryman.queries), 1)
+
+        pretty = self.client.get('/total_balance_as_of_date/2019-06-26?pretty=1')
+        self.assertNotEqual(pretty.headers['ETag'], first.headers['ETag'])
+
+    def test_today_has_no_validator(self):
+        response = self.client.get('/total_balance_as_of_date/today')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+
+class TestCurrencyConversion(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        rates = RateTable({'EUR': {'2019-06-01': Decimal('1.10'), '2019-07-01': Decimal('1.20')}, 'GBP': {}})
+        patch = mock.patch.object(rest_api, 'fx_table', rates)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_totals_in_one_currency(self):
+        response = self.client.get('/total_balance_as_of_date/2019-06-26?in=usd')
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.data)
+        self.assertEqual(body['balance'], {'USD': '29.70000000'})
+        self.assertEqual(body['fx_rates'], {'EUR': '1.10'})
+
+        lines = self.client.get('/total_balance_range/2019-06-30/2019-07-01?in=USD').data.decode().splitlines()
+        self.assertEqual([json.loads(line)['balance'] for line in lines], [{'USD': '34.10000000'}, {'USD': '2.40000000'}])
+
+    def test_unknown_currency_or_rate(self):
+        self.assertEqual(self.client.get('/total_balance_as_of_date/2019-06-26?in=JPY').status_code, 400)
+        self.assertEqual(self.client.get('/total_balance_as_of_date/2019-05-26?in=USD').status_code, 400)
+        self.assertEqual(self.client.get('/total_balance_as_of_date/2019-06-26?in=GBP').status_code, 400)
+        with mock.patch.object(rest_api, 'fx_table', None):
+            self.assertEqual(self.client.get('/total_balance_as_of_date/2019-06-26?in=USD').status_code, 400)
+
+    def test_rates_past_the_table(self):
+        # carried forward a few days past the last fixing, but not cached for good
+        response = self.client.get('/total_balance_as_of_date/2019-07-03?in=USD')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertNotIn('Cache-Control', response.headers)
+        self.assertEqual(self.client.get('/total_balance_as_of_date/2019-07-10?in=USD').status_code, 400)
+
+    def test_etag_follows_the_rates(self):
+        etag = self.client.get('/total_balance_as_of_date/2019-06-26?in=USD').headers['ETag']
+        rates = RateTable({'EUR': {'2019-06-01': Decimal('1.11'), '2019-07-01': Decimal('1.20')}})
+        with mock.patch.object(rest_api, 'fx_table', rates):
+            response = self.client.get('/total_balance_as_of_date/2019-06-26?in=USD', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
@@ -0,0 +1,48 @@
+import json
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+from flask import Flask
+
+from bluebear.app_pkg.controllers.api import serializers
+
+
+class TestSerializers(unittest.TestCase):
+
+    DATA = {
+        'as_of_utc': datetime(2019, 6, 26, 22),
+        'day': date(2019, 6, 26),
+        'balance': {'EUR': Decimal('10.05'), 'JPY': Decimal('41')},
+    }
+    EXPECTED = {
+        'as_of_utc': '2019-06-26 22:00:00',
+        'day': '2019-06-26',
+        'balance': {'EUR': '10.05', 'JPY': '41'},
+    }
+
+    def test_backends_agree(self):
+        backends = [None, serializers.orjson] if serializers.orjson else [None]
+        for backend in backends:
+            with mock.patch.object(serializers, 'orjson', backend):
+                compact = serializers.dumps(self.DATA)
+                pretty = serializers.dumps(self.DATA, pretty=True)
+            self.assertEqual(json.loads(compact), self.EXPECTED)
+            self.assertNotIn(b': ', compact)
+            self.assertEqual(json.loads(pretty), self.EXPECTED)
+            self.assertIn(b'\n  "balance"', pretty)
+
+    def test_unknown_types_are_rejected(self):
+        with self.assertRaises(TypeError):
+            serializers.dumps({'x': object()})
+
+    def test_output_json(self):
+        app = Flask(__name__)
+        with app.test_request_context('/?pretty=1'):
+            response = serializers.output_json(self.DATA, 200, {'X-Test': '1'})
+        self.assertEqual(response.headers['Content-Type'], 'application/json')
+        self.assertEqual(response.headers['X-Test'], '1')
+        self.assertIn(b'\n  ', response.data)
+        with app.test_request_context('/'):
+            self.assertNotIn(b'\n  ', serializers.output_json(self.DATA, 200).data)
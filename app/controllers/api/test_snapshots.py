@@ -0,0 +1,95 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+from bluebear.app_pkg import store
+from bluebear.app_pkg.controllers.api.snapshots import SnapshotCache
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patch = mock.patch.object(store, 'RUNTIME_DIR', self.tmp.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.now = datetime(2021, 3, 10, 12).timestamp()
+        self.loads = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cache(self, **kwargs):
+        return SnapshotCache(clock=lambda: self.now, **kwargs)
+
+    def load(self, amount='1.5'):
+        def load():
+            self.loads.append(amount)
+            return {'EUR': Decimal(amount)}
+        return load
+
+    def test_past_days_are_final(self):
+        cache = self.cache()
+        self.assertEqual(cache.get('2021-03-01 22:00:00', self.load()), {'EUR': Decimal('1.5')})
+        self.now += 365 * 86400
+        self.assertEqual(cache.get('2021-03-01 22:00:00', self.load('2')), {'EUR': Decimal('1.5')})
+        self.assertEqual(self.loads, ['1.5'])
+
+    def test_today_expires(self):
+        cache = self.cache(today_ttl=60)
+        cache.get('2021-03-10 22:00:00', self.load())
+        self.now += 30
+        cache.get('2021-03-10 22:00:00', self.load('2'))
+        self.now += 31
+        self.assertEqual(cache.get('2021-03-10 22:00:00', self.load('2')), {'EUR': Decimal('2')})
+        self.assertEqual(self.loads, ['1.5', '2'])
+
+    def test_shared_through_store(self):
+        self.cache().get('2021-03-01 22:00:00', self.load())
+        self.assertEqual(self.cache().get('2021-03-01 22:00:00', self.load('2')), {'EUR': Decimal('1.5')})
+        self.assertEqual(self.loads, ['1.5'])
+        # in the runtime dir of the local store, like the site's own stores
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'snapshots.sqlite3')))
+
+    def test_lru_byte_budget(self):
+        cache = self.cache(store_name=None, memory_budget=30)
+        for day in ('01', '02', '03'):
+            cache.get(f'2021-03-{day} 22:00:00', self.load())
+        cache.get('2021-03-01 22:00:00', self.load())
+        self.assertEqual(len(self.loads), 4)    # 13-byte entries: only the last two fit
+
+    def test_single_flight(self):
+        cache = self.cache()
+        release = threading.Event()
+
+        def slow_load():
+            self.loads.append('slow')
+            release.wait(5)
+            return {'EUR': Decimal(1)}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get('2021-03-10 22:00:00', slow_load)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, ['slow'])
+        self.assertEqual(results, [{'EUR': Decimal(1)}] * 5)
+
+    def test_failed_load_is_not_cached(self):
+        cache = self.cache()
+
+        def broken():
+            raise ConnectionError('influx down')
+
+        with self.assertRaises(ConnectionError):
+            cache.get('2021-03-01 22:00:00', broken)
+        self.assertEqual(cache.get('2021-03-01 22:00:00', self.load()), {'EUR': Decimal('1.5')})
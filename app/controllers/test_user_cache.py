@@ -0,0 +1,88 @@
+import unittest
+
+from bluebear.app_pkg.controllers.user_cache import FailedLogins, UserCache
+
+
+class TestUserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.loads = []
+        self.cache = UserCache(ttl=60, max_entries=2, clock=lambda: self.now)
+
+    def load(self, user_id):
+        def load():
+            self.loads.append(user_id)
+            return {'id': user_id} if user_id != 'gone' else None
+        return load
+
+    def test_served_from_the_session_until_expired(self):
+        self.assertEqual(self.cache.get('s1', '1', self.load('1')), {'id': '1'})
+        self.cache.get('s1', '1', self.load('1'))
+        self.assertEqual(self.loads, ['1'])
+
+        # another session of the same user is its own entry
+        self.cache.get('s2', '1', self.load('1'))
+        self.now = 61
+        self.cache.get('s1', '1', self.load('1'))
+        self.assertEqual(self.loads, ['1', '1', '1'])
+
+    def test_unknown_users_and_sessions_are_not_cached(self):
+        self.assertIsNone(self.cache.get('s1', 'gone', self.load('gone')))
+        self.cache.get('s1', 'gone', self.load('gone'))
+        self.cache.get(None, '1', self.load('1'))
+        self.cache.get(None, '1', self.load('1'))
+        self.assertEqual(self.loads, ['gone', 'gone', '1', '1'])
+
+    def test_invalidate(self):
+        self.cache.get('s1', '1', self.load('1'))
+        self.cache.get('s2', '2', self.load('2'))
+        self.cache.invalidate(session_id='s1')
+        self.cache.get('s1', '1', self.load('1'))
+        self.cache.get('s2', '2', self.load('2'))
+        self.assertEqual(self.loads, ['1', '2', '1'])
+
+        self.cache.invalidate(user_id='2')
+        self.cache.get('s2', '2', self.load('2'))
+        self.cache.invalidate()
+        self.cache.get('s1', '1', self.load('1'))
+        self.assertEqual(self.loads, ['1', '2', '1', '2', '1'])
+
+    def test_bounded(self):
+        for session_id in ('s1', 's2', 's3'):
+            self.cache.get(session_id, '1', self.load('1'))
+        self.cache.get('s3', '1', self.load('1'))
+        self.cache.get('s1', '1', self.load('1'))
+        self.assertEqual(len(self.loads), 4)
+
+
+class TestFailedLogins(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.failures = FailedLogins(free_attempts=2, backoff_base=1, backoff_max=4, forget_after=100,
+                                     clock=lambda: self.now)
+
+    def test_backoff_doubles_past_the_free_attempts(self):
+        self.assertEqual([self.failures.failed('Mallory') for _ in range(6)], [0, 0, 1, 2, 4, 4])
+        self.assertEqual(self.failures.retry_after(' mallory '), 4)
+        self.now = 3
+        self.assertEqual(self.failures.retry_after('mallory'), 1)
+        self.assertEqual(self.failures.retry_after('alice'), 0)
+
+    def test_success_and_time_reset(self):
+        for _ in range(3):
+            self.failures.failed('bob')
+        self.failures.succeeded('bob')
+        self.assertEqual(self.failures.retry_after('bob'), 0)
+        self.assertEqual(self.failures.failed('bob'), 0)
+
+        for _ in range(3):
+            self.failures.failed('carol')
+        self.now = 200
+        self.assertEqual(self.failures.retry_after('carol'), 0)
+        self.assertEqual(self.failures.failed('carol'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Per-worker caches in front of the user table.
+
+`UserCache` keeps the user of each login session (flask_login's session id) for
+`ttl` seconds, so authenticated page views do not query the user table; logout
+drops the session's entry and `invalidate(user_id=...)` every entry of a user
+(e.g. after a password change; other workers catch up within `ttl`).
+
+`FailedLogins` is the negative side: usernames that keep failing to log in,
+existing or not, are refused without a query or a password hash for a delay
+that doubles with every failure past the first few.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+USER_TTL = 300
+MAX_SESSIONS = 10000
+FREE_ATTEMPTS = 3        # failures allowed before the backoff starts
+BACKOFF_BASE = 1
+BACKOFF_MAX = 300
+FORGET_AFTER = 900       # seconds without failures after which a username starts over
+MAX_USERNAMES = 10000
+
+
+class UserCache(Generic[T]):
+
+    def __init__(self, ttl: float = USER_TTL, max_entries: int = MAX_SESSIONS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        # (session id, user id) -> (user, expiry)
+        self._entries: 'OrderedDict[Tuple[Hashable, str], Tuple[T, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id: Optional[Hashable], user_id: str, user: T):
+        if session_id is None:
+            return
+        with self._lock:
+            self._entries[(session_id, user_id)] = (user, self.clock() + self.ttl)
+            self._entries.move_to_end((session_id, user_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, session_id: Optional[Hashable], user_id: str, load: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        The user `user_id` of session `session_id`, calling `load` on a miss; unknown users are not cached.
+        """
+        if session_id is not None:
+            key = (session_id, user_id)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > self.clock():
+                    self._entries.move_to_end(key)
+                    return entry[0]
+        user = load()
+        if user is not None:
+            self.put(session_id, user_id, user)
+        return user
+
+    def invalidate(self, session_id: Optional[Hashable] = None, user_id: Optional[str] = None):
+        """
+        Drop the entries of `session_id` and/or of `user_id`, everything if neither is given.
+        """
+        with self._lock:
+            if session_id is None and user_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries
+                        if session_id in (None, key[0]) and user_id in (None, key[1])]:
+                del self._entries[key]
+
+
+class FailedLogins:
+
+    def __init__(self, free_attempts: int = FREE_ATTEMPTS, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX, forget_after: float = FORGET_AFTER,
+                 max_entries: int = MAX_USERNAMES, clock: Callable[[], float] = time.monotonic):
+        self.free_attempts = free_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.forget_after = forget_after
+        self.max_entries = max_entries
+        self.clock = clock
+        # username -> (failures, blocked until, last failure)
+        self._entries: 'OrderedDict[str, Tuple[int, float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return (username or '').strip().lower()
+
+    def _entry(self, key: str, now: float) -> Optional[Tuple[int, float, float]]:
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[2] > self.forget_after:
+            del self._entries[key]
+            return None
+        return entry
+
+    def retry_after(self, username: str) -> float:
+        """
+        Seconds before `username` may try again, 0 if it may now.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entry(self._key(username), now)
+        return max(0.0, entry[1] - now) if entry is not None else 0.0
+
+    def failed(self, username: str) -> float:
+        """
+        Record a failure of `username`; returns the seconds it is now refused for.
+        """
+        key, now = self._key(username), self.clock()
+        with self._lock:
+            entry = self._entry(key, now)
+            failures = (entry[0] if entry is not None else 0) + 1
+            delay = 0.0
+            if failures > self.free_attempts:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - self.free_attempts - 1))
+            self._entries[key] = (failures, now + delay, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return delay
+
+    def succeeded(self, username: str):
+        with self._lock:
+            self._entries.pop(self._key(username), None)
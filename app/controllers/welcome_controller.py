@@ -1,16 +1,49 @@
 """
 Main controller handling log-in and landing page.
+
+Users are looked up through the per-worker caches of user_cache.py: the user
+loader registered with the app's login manager serves sessions from UserCache,
+and usernames that keep failing to log in are refused before any query.
 """
 
+import math
+
 import flask_login
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from sqlalchemy.orm import object_session
 from bluebear.script import constants
+from bluebear.app_pkg.controllers.user_cache import FailedLogins, UserCache
 from bluebear.app_pkg.forms import LoginForm
 from bluebear.app_pkg.models.user_model import User
 
 
 welcome_controller = Blueprint('welcome_controller', __name__)
 
+user_cache = UserCache()
+failed_logins = FailedLogins()
+
+
+def detached(user):
+    # cached users outlive the request's database session: keep their loaded columns, drop the session
+    db_session = object_session(user) if user is not None else None
+    if db_session is not None:
+        db_session.expunge(user)
+    return user
+
+
+def load_user(user_id):
+    """
+    flask_login user loader, served from the cache of the current login session.
+    """
+    return user_cache.get(session.get('_id'), user_id, lambda: detached(User.query.get(int(user_id))))
+
+
+@welcome_controller.record_once
+def use_cached_user_loader(state):
+    login_manager = getattr(state.app, 'login_manager', None)
+    if login_manager is not None:
+        login_manager.user_loader(load_user)
+
 
 @welcome_controller.route('/login', methods=['GET', 'POST'])
 def login():
@@ -28,16 +61,26 @@ def login():
 
     if request.method == 'POST' and form.validate_on_submit():
 
+        # a username that keeps failing costs neither a query nor a password hash until its backoff is over
+        retry_after = failed_logins.retry_after(form.username.data)
+        if retry_after:
+            error = 'Too many failed attempts, please try again later.'
+            return render_template('login.html', error=error, form=form), 429, \
+                {'Retry-After': str(math.ceil(retry_after))}
+
         user = User.query.filter_by(username=form.username.data).first()
 
         if user is None or not user.check_password(form.password.data):
+            failed_logins.failed(form.username.data)
             flash('Invalid username or password')
             error = 'Invalid Credentials!'
             return render_template('login.html', error=error, form=form)
 
+        failed_logins.succeeded(form.username.data)
         # add again remember me checkbox to front end?
         flask_login.login_user(user, remember=form.remember_me.data)
         session['logged_in'] = True
+        user_cache.put(session.get('_id'), user.get_id(), detached(user))
         return redirect(url_for('welcome_controller.index'))
 
     return render_template('login.html', title='Log In', form=form)
@@ -49,6 +92,7 @@ def logout():
     Logs out user.
     :return: index()
     """
+    user_cache.invalidate(session_id=session.get('_id'))
     flask_login.logout_user()
     return index()
 
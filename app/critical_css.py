@@ -0,0 +1,299 @@
+"""
+Critical CSS for the landing page.
+
+`flask build-critical-css` renders the landing page in every language, collects
+the tags, ids and classes of the header/hero section and keeps only the rules of
+the CSS bundle that can match them (plus the @font-face and @keyframes they use).
+The result is inlined in <head> by `critical_css()`, and the full stylesheet is
+then loaded without blocking rendering. The build reports the bytes of the
+stylesheets still blocking rendering in the page, measured from the page
+rendered without and with the critical CSS; a stylesheet of another host that
+cannot be downloaded (e.g. offline) is listed as unmeasured.
+
+Matching is deliberately generous: a selector is kept when every tag, id and
+class it names occurs somewhere in the fragment, ignoring combinators and
+pseudo-classes. A few extra rules cost little; a missing one means a flash.
+"""
+
+import json
+import os
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+import click
+from markupsafe import Markup
+
+from app import app, assets, bundles, fonts, i18n
+
+
+CRITICAL_DIR = os.path.join(app.static_folder, "build", "critical")
+REPORT_PATH = os.path.join(CRITICAL_DIR, "report.json")
+ABOVE_THE_FOLD = re.compile(r'<header id="header".*?</header>', re.S)
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+PSEUDO = re.compile(r"::?[\w-]+(\([^)]*\))?")
+ATTRIBUTE = re.compile(r"""\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*["']?([^"'\]]*)["']?)?\s*\]""")
+SIMPLE = re.compile(r"([#.]?)(-?[_a-zA-Z][\w-]*|\*)")
+COMBINATORS = re.compile(r"\s*[>+~]\s*|\s+")
+
+Block = Tuple[str, Union[str, list]]
+
+
+class _UsedSelectors(HTMLParser):
+
+    def __init__(self):
+        super().__init__()
+        self.tags: Set[str] = {"html", "body", "*"}
+        self.ids: Set[str] = set()
+        self.classes: Set[str] = set()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        for name, value in attrs:
+            if name == "id" and value:
+                self.ids.add(value)
+            elif name == "class" and value:
+                self.classes.update(value.split())
+
+
+class _BlockingStylesheets(HTMLParser):
+    """
+    The stylesheet links of <head> that block rendering (preloaded and <noscript> ones do not).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hrefs: List[str] = []
+        self._in_head = False
+        self._noscript = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "head":
+            self._in_head = True
+        elif tag == "noscript":
+            self._noscript += 1
+        elif tag == "link" and self._in_head and not self._noscript and attrs.get("href") \
+                and "stylesheet" in (attrs.get("rel") or "").lower().split() \
+                and attrs.get("media", "all") in ("all", "screen"):
+            self.hrefs.append(attrs["href"])
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+        elif tag == "noscript" and self._noscript:
+            self._noscript -= 1
+
+
+def render_blocking_bytes(html: str, fetch: Callable[[str], bytes] = fonts._fetch) -> Tuple[int, List[str]]:
+    """
+    Bytes of the stylesheets blocking the rendering of `html`, and the ones that could not be measured.
+
+    Stylesheets of other hosts are downloaded with `fetch`; those it fails on are left out of the bytes.
+    """
+    parser = _BlockingStylesheets()
+    parser.feed(html)
+    total, unmeasured = 0, []
+    for href in parser.hrefs:
+        path = href.split("?", 1)[0].split("#", 1)[0]
+        if path.startswith(app.static_url_path + "/"):
+            filename = path[len(app.static_url_path) + 1:]
+            total += os.path.getsize(os.path.join(app.static_folder, assets.LOGICAL.get(filename, filename)))
+            continue
+        try:
+            total += len(fetch(href))
+        except OSError:
+            unmeasured.append(href)
+    return total, unmeasured
+
+
+def parse(css: str) -> List[Block]:
+    """
+    Split a stylesheet into (prelude, declarations) blocks; @media/@supports nest their blocks.
+    """
+    css = CSS_COMMENT.sub("", css)
+    blocks: List[Block] = []
+    i = 0
+    while True:
+        brace = css.find("{", i)
+        if brace == -1:
+            return blocks
+        semicolon = css.find(";", i, brace)
+        if semicolon != -1:
+            # @charset/@import or a stray semicolon before the next block
+            i = semicolon + 1
+            continue
+
+        depth, j = 1, brace + 1
+        while depth and j < len(css):
+            depth += {"{": 1, "}": -1}.get(css[j], 0)
+            j += 1
+        prelude, body = css[i:brace].strip(), css[brace + 1:j - 1]
+        if prelude.startswith(("@media", "@supports")):
+            blocks.append((prelude, parse(body)))
+        else:
+            blocks.append((prelude, body))
+        i = j
+
+
+def _attribute_matches(used: _UsedSelectors, name: str, op: str, value: str) -> bool:
+    if name != "class" or not op:
+        return True
+    if op == "^=":
+        return any(c.startswith(value) for c in used.classes)
+    if op == "*=":
+        return any(value.strip() in c for c in used.classes)
+    if op == "$=":
+        return any(c.endswith(value) for c in used.classes)
+    return value in used.classes
+
+
+def selector_matches(selector: str, used: _UsedSelectors) -> bool:
+    selector = PSEUDO.sub("", selector)
+    for name, op, value in ATTRIBUTE.findall(selector):
+        if not _attribute_matches(used, name, op, value):
+            return False
+    selector = ATTRIBUTE.sub("", selector)
+
+    for compound in COMBINATORS.split(selector.strip()):
+        for kind, name in SIMPLE.findall(compound):
+            if kind == "#" and name not in used.ids:
+                return False
+            if kind == "." and name not in used.classes:
+                return False
+            if not kind and name.lower() not in used.tags:
+                return False
+    return True
+
+
+def _minify(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def extract(css: str, html: str) -> str:
+    """
+    The rules of `css` needed to render `html`.
+    """
+    used = _UsedSelectors()
+    used.feed(html)
+
+    def keep(blocks: List[Block]) -> List[str]:
+        kept = []
+        for prelude, body in blocks:
+            if isinstance(body, list):
+                inner = keep(body)
+                if inner:
+                    kept.append(f"{_minify(prelude)}{{{''.join(inner)}}}")
+            elif not prelude.startswith("@") and any(
+                selector_matches(selector, used) for selector in prelude.split(",")
+            ):
+                kept.append(f"{_minify(prelude)}{{{_minify(body)}}}")
+        return kept
+
+    blocks = parse(css)
+    rules = keep(blocks)
+    declarations = "".join(rules)
+
+    # fonts and animations referenced by the kept rules
+    extra = []
+    for prelude, body in blocks:
+        if prelude == "@font-face":
+            family = re.search(r"font-family\s*:\s*['\"]?([^;'\"]+)", body)
+            if family and family.group(1).strip() in declarations:
+                extra.append(f"@font-face{{{_minify(body)}}}")
+        elif prelude.startswith(("@keyframes", "@-webkit-keyframes")):
+            if prelude.split()[-1] in declarations:
+                extra.append(f"{prelude}{{{_minify(body)}}}")
+    return "".join(extra + rules)
+
+
+def stylesheet() -> str:
+    """
+    The full CSS of the landing page, with urls made absolute for inlining.
+    """
+    parts = []
+    for source in bundles.sources("build/bundle.css"):
+        with open(os.path.join(app.static_folder, source), encoding="utf-8") as f:
+            parts.append(bundles.rebase_css_urls(f.read(), source, "", prefix=app.static_url_path + "/"))
+    return "\n".join(parts)
+
+
+def build(fetch: Callable[[str], bytes] = fonts._fetch) -> Dict[str, dict]:
+    """
+    Write build/critical/<lang>.css for every language; returns the render-blocking bytes report.
+    """
+    from app.routes import render_index
+
+    def render(lang: str) -> str:
+        with app.test_request_context(f"/{lang}"):
+            return render_index(lang)
+
+    downloaded: Dict[str, Optional[bytes]] = {}
+
+    def fetch_once(url: str) -> bytes:
+        # a failure too, so an unreachable host costs one timeout
+        if url not in downloaded:
+            try:
+                downloaded[url] = fetch(url)
+            except OSError:
+                downloaded[url] = None
+        if downloaded[url] is None:
+            raise OSError(f"Could not download {url}")
+        return downloaded[url]
+
+    css = stylesheet()
+    os.makedirs(CRITICAL_DIR, exist_ok=True)
+    report = {}
+    for lang in i18n.LANGS:
+        CRITICAL.pop(lang, None)
+        html = render(lang)
+        fragment = ABOVE_THE_FOLD.search(html)
+        critical = extract(css, fragment.group(0) if fragment else html)
+        with open(os.path.join(CRITICAL_DIR, f"{lang}.css"), "w", encoding="utf-8") as f:
+            f.write(critical)
+        CRITICAL[lang] = critical
+        before, unmeasured_before = render_blocking_bytes(html, fetch_once)
+        after, unmeasured_after = render_blocking_bytes(render(lang), fetch_once)
+        report[lang] = {
+            "render_blocking_bytes_before": before,
+            "render_blocking_bytes_after": after,
+            "unmeasured": sorted(set(unmeasured_before + unmeasured_after)),
+            "inlined_bytes": len(critical.encode("utf-8")),
+        }
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    return report
+
+
+def _load() -> Dict[str, str]:
+    critical = {}
+    for lang in i18n.LANGS:
+        try:
+            with open(os.path.join(CRITICAL_DIR, f"{lang}.css"), encoding="utf-8") as f:
+                critical[lang] = f.read()
+        except FileNotFoundError:
+            pass
+    return critical
+
+
+CRITICAL = _load()
+
+
+@app.template_global()
+def critical_css(lang: str) -> Markup:
+    """
+    Inline critical CSS for `lang`, empty if it was never built.
+    """
+    return Markup(CRITICAL.get(lang, ""))
+
+
+@app.cli.command("build-critical-css")
+def build_critical_css_command():
+    """Extract the above-the-fold CSS of every landing page."""
+    for lang, sizes in build().items():
+        click.echo(
+            f"{lang}: render-blocking CSS {sizes['render_blocking_bytes_before']} -> "
+            f"{sizes['render_blocking_bytes_after']} bytes ({sizes['inlined_bytes']} bytes inlined)"
+            + (f", not measured: {', '.join(sizes['unmeasured'])}" if sizes["unmeasured"] else "")
+        )
@@ -0,0 +1,197 @@
+"""
+Subset icon fonts and self-hosted web fonts.
+
+`flask build-fonts` scans the rendered landing pages (and the site's own JS,
+which toggles a couple of icons) for the icofont/remixicon/boxicons classes
+actually used, writes a woff2 subset of each icon font with only those glyphs
+and a trimmed stylesheet next to it in app/static/build/fonts. It also
+downloads the Google Fonts the site uses so they are served locally with
+`font-display: swap`.
+
+The bundles pick up the trimmed icon stylesheets automatically (see TRIMMED);
+`web_fonts()` links the local font stylesheet when it exists and Google Fonts
+otherwise. Building needs fontTools and brotli.
+"""
+
+import glob
+import os
+import re
+import urllib.request
+from typing import Dict, Iterable, Set
+
+import click
+from markupsafe import Markup
+
+from app import app, assets, i18n
+
+
+FONTS_DIR = os.path.join(app.static_folder, "build", "fonts")
+
+ICON_FONTS = {
+    # name: (stylesheet, font, class prefixes)
+    "icofont": ("vendor/icofont/icofont.min.css", "vendor/icofont/fonts/icofont.woff2", ("icofont-",)),
+    "remixicon": ("vendor/remixicon/remixicon.css", "vendor/remixicon/remixicon.woff2", ("ri-",)),
+    "boxicons": ("vendor/boxicons/css/boxicons.min.css", "vendor/boxicons/fonts/boxicons.woff2", ("bx-", "bxs-", "bxl-")),
+}
+
+ICON_CLASS = re.compile(r"(?<![\w-])((?:icofont|ri|bxs|bxl|bx)-[a-z0-9-]+)")
+GLYPH_RULE = re.compile(r"^\.([\w-]+):{1,2}before$")
+GLYPH_CONTENT = re.compile(r"""content\s*:\s*["']\\([0-9a-fA-F]+)["']""")
+
+# the weights the stylesheets use, and Open Sans italic for .font-italic and the testimonials
+GOOGLE_FONTS_URL = (
+    "https://fonts.googleapis.com/css2?family=Open+Sans:ital,wght@0,400;0,600;0,700;1,400"
+    "&family=Poppins:wght@400;500;600;700&family=Raleway:wght@400;500;600;700&display=swap"
+)
+# woff2 is only served to browsers that announce they support it
+BROWSER_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def used_icon_classes(texts: Iterable[str]) -> Set[str]:
+    return {match for text in texts for match in ICON_CLASS.findall(text)}
+
+
+def _minify(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def trim_stylesheet(css: str, font_file: str, used: Set[str]):
+    """
+    Keep the base rules and the glyph rules of `used` classes; returns (css, codepoints).
+    """
+    from app.critical_css import parse
+
+    kept, codepoints = [], set()
+    for prelude, body in parse(css):
+        if isinstance(body, list):
+            continue
+        if prelude == "@font-face":
+            family = re.search(r"font-family\s*:\s*([^;]+)", body).group(1).strip()
+            kept.insert(0, f'@font-face{{font-family:{family};font-display:swap;src:url({font_file}) format("woff2")}}')
+            continue
+
+        selectors = [s.strip() for s in prelude.split(",")]
+        content = GLYPH_CONTENT.search(body)
+        glyphs = [GLYPH_RULE.match(s) for s in selectors]
+        if content and all(glyphs):
+            selectors = [s for s, glyph in zip(selectors, glyphs) if glyph.group(1) in used]
+            if not selectors:
+                continue
+            codepoints.add(int(content.group(1), 16))
+        kept.append(f"{','.join(selectors)}{{{_minify(body)}}}")
+    return "".join(kept), codepoints
+
+
+def subset_font(source: str, target: str, codepoints: Set[int]):
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, target, options)
+
+
+def build_icon_fonts(texts: Iterable[str], fonts_dir: str = FONTS_DIR) -> Dict[str, Dict[str, int]]:
+    used = used_icon_classes(texts)
+    os.makedirs(fonts_dir, exist_ok=True)
+    report = {}
+    for name, (stylesheet, font, prefixes) in ICON_FONTS.items():
+        with open(os.path.join(app.static_folder, stylesheet), encoding="utf-8") as f:
+            css, codepoints = trim_stylesheet(
+                f.read(), f"{name}.woff2", {c for c in used if c.startswith(prefixes)}
+            )
+        target = os.path.join(fonts_dir, f"{name}.woff2")
+        subset_font(os.path.join(app.static_folder, font), target, codepoints)
+        with open(os.path.join(fonts_dir, f"{name}.css"), "w", encoding="utf-8") as f:
+            f.write(css)
+        report[name] = {
+            "glyphs": len(codepoints),
+            "bytes_before": os.path.getsize(os.path.join(app.static_folder, font)),
+            "bytes_after": os.path.getsize(target),
+        }
+    return report
+
+
+def _fetch(url: str) -> bytes:
+    request = urllib.request.Request(url, headers={"User-Agent": BROWSER_UA})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def build_web_fonts(fonts_dir: str = FONTS_DIR, fetch=_fetch) -> int:
+    """
+    Download the Google Fonts stylesheet and its woff2 files; returns the bytes downloaded.
+    """
+    css = fetch(GOOGLE_FONTS_URL).decode("utf-8")
+    os.makedirs(os.path.join(fonts_dir, "web"), exist_ok=True)
+    total = 0
+
+    def localize(match):
+        nonlocal total
+        url = match.group(1)
+        name = "web/" + url.rsplit("/", 1)[-1]
+        data = fetch(url)
+        total += len(data)
+        with open(os.path.join(fonts_dir, name), "wb") as f:
+            f.write(data)
+        return f"url({name})"
+
+    css = re.sub(r"url\((https://fonts\.gstatic\.com/[^)]+)\)", localize, css)
+    if "font-display" not in css:
+        css = css.replace("@font-face {", "@font-face {\n  font-display: swap;")
+    with open(os.path.join(fonts_dir, "fonts.css"), "w", encoding="utf-8") as f:
+        f.write(css)
+    return total
+
+
+def _trimmed() -> Dict[str, str]:
+    return {
+        stylesheet: f"build/fonts/{name}.css"
+        for name, (stylesheet, _, _) in ICON_FONTS.items()
+        if os.path.exists(os.path.join(FONTS_DIR, f"{name}.css"))
+    }
+
+
+# vendor icon stylesheet -> trimmed replacement, for the ones that were built
+TRIMMED = _trimmed()
+WEB_FONTS_BUILT = os.path.exists(os.path.join(FONTS_DIR, "fonts.css"))
+
+
+@app.template_global()
+def web_fonts() -> Markup:
+    """
+    Stylesheet link of the web fonts, self-hosted once built.
+    """
+    if WEB_FONTS_BUILT:
+        return Markup('<link href="%s" rel="stylesheet">') % assets.asset_url("build/fonts/fonts.css")
+    return Markup(
+        '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+        '<link href="%s" rel="stylesheet">'
+    ) % GOOGLE_FONTS_URL
+
+
+@app.cli.command("build-fonts")
+@click.option("--skip-web-fonts", is_flag=True, help="Only subset the icon fonts.")
+def build_fonts_command(skip_web_fonts):
+    """Subset icon fonts to the glyphs in use and self-host the web fonts."""
+    from app.routes import render_index
+
+    texts = []
+    for lang in i18n.LANGS:
+        with app.test_request_context(f"/{lang}"):
+            texts.append(render_index(lang))
+    for path in glob.glob(os.path.join(app.static_folder, "js", "*.js")):
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+
+    for name, sizes in build_icon_fonts(texts).items():
+        click.echo(f"{name}: {sizes['glyphs']} glyphs, {sizes['bytes_before']} -> {sizes['bytes_after']} bytes")
+
+    if not skip_web_fonts:
+        try:
+            click.echo(f"web fonts: {build_web_fonts()} bytes self-hosted")
+        except OSError as error:
+            click.echo(f"web fonts: download failed ({error}), keeping Google Fonts", err=True)
@@ -0,0 +1,48 @@
+"""
+Translation catalog.
+
+The it/en/jp strings live in app/translations/<lang>.json. They are loaded once
+at import and frozen into read-only mappings; keys missing from a language fall
+back to Italian.
+"""
+
+import json
+import os
+from types import MappingProxyType
+from typing import Mapping
+
+
+LANGS = ("it", "en", "jp")
+DEFAULT_LANG = "it"
+
+TRANSLATIONS_DIR = os.path.join(os.path.dirname(__file__), "translations")
+
+
+def _load(lang: str) -> dict:
+    with open(os.path.join(TRANSLATIONS_DIR, f"{lang}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _build() -> Mapping[str, Mapping[str, str]]:
+    default = _load(DEFAULT_LANG)
+    catalog = {}
+    for lang in LANGS:
+        strings = dict(default)
+        strings.update(_load(lang))
+        catalog[lang] = MappingProxyType(strings)
+    return MappingProxyType(catalog)
+
+
+CATALOG = _build()
+
+
+def normalize_lang(lang: str) -> str:
+    lang = (lang or DEFAULT_LANG).lower()
+    return lang if lang in CATALOG else DEFAULT_LANG
+
+
+def translations(lang: str) -> Mapping[str, str]:
+    """
+    Read-only strings for `lang` (Italian if unknown).
+    """
+    return CATALOG[normalize_lang(lang)]
@@ -0,0 +1,171 @@
+"""
+Responsive image derivatives.
+
+`flask build-images` walks app/static/img once and writes resized AVIF/WebP/JPEG
+variants into app/static/build/img, named after the hash of the source file, plus
+a JSON manifest. Unchanged sources (same hash, outputs present) are skipped.
+The `picture()` template helper turns a manifest entry into a <picture> with
+srcsets, and falls back to the original file when there is no entry.
+
+Needs Pillow at build time (pillow-heif for .HEIC sources); serving only reads
+the manifest.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import click
+from flask import url_for
+from markupsafe import Markup, escape
+
+from app import app
+from app.assets import asset_url
+
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = os.path.join(app.static_folder, "img")
+OUTPUT_DIR = os.path.join(app.static_folder, "build", "img")
+MANIFEST_PATH = os.path.join(app.static_folder, "build", "images.json")
+
+WIDTHS = (320, 640, 1024, 1600)
+FORMATS = (
+    # (format, extension, mimetype, save options)
+    ("AVIF", "avif", "image/avif", {"quality": 50}),
+    ("WEBP", "webp", "image/webp", {"quality": 75, "method": 6}),
+    ("JPEG", "jpg", "image/jpeg", {"quality": 80, "optimize": True, "progressive": True}),
+)
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".heic")
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _outputs_exist(entry: dict, output_dir: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(output_dir, variant["file"]))
+        for variants in entry["variants"].values()
+        for variant in variants
+    )
+
+
+def derive(source: str, digest: str, output_dir: str) -> dict:
+    """
+    Write every width/format variant of `source`; runs in a worker process.
+    """
+    from PIL import Image, ImageOps, features
+
+    try:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+    except ImportError:
+        pass
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    widths = [w for w in WIDTHS if w < image.width] + [image.width]
+    entry = {"hash": digest, "width": image.width, "height": image.height, "variants": {}}
+    for fmt, ext, mimetype, options in FORMATS:
+        if fmt != "JPEG" and not features.check(fmt.lower()):
+            continue
+        variants = entry["variants"][mimetype] = []
+        for width in widths:
+            name = f"{digest}-{width}.{ext}"
+            resized = image if width == image.width else image.resize(
+                (width, round(image.height * width / image.width)), Image.LANCZOS
+            )
+            resized.save(os.path.join(output_dir, name), fmt, **options)
+            variants.append({"file": name, "width": width})
+    return entry
+
+
+def build(source_dir: str = SOURCE_DIR, output_dir: str = OUTPUT_DIR, manifest_path: str = MANIFEST_PATH,
+          jobs: Optional[int] = None) -> Dict[str, dict]:
+    """
+    (Re)build the derivatives of every changed source and rewrite the manifest.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    previous = load_manifest(manifest_path)
+    manifest, todo = {}, {}
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            key = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            digest = file_hash(path)
+            entry = previous.get(key)
+            if entry and entry["hash"] == digest and _outputs_exist(entry, output_dir):
+                manifest[key] = entry
+            else:
+                todo[key] = (path, digest)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {key: pool.submit(derive, path, digest, output_dir) for key, (path, digest) in todo.items()}
+        for key, future in futures.items():
+            try:
+                manifest[key] = future.result()
+            except Exception as error:
+                logger.error("Could not derive %s: %s", key, error)
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    logger.info("Images: %d derived, %d unchanged", len(todo), len(manifest) - len(todo))
+    return manifest
+
+
+MANIFEST = load_manifest()
+
+
+@app.template_global()
+def picture(src: str, alt: str = "", class_: str = "", sizes: str = "100vw") -> Markup:
+    """
+    <picture> for the image at app/static/img/<src>, or a plain <img> if it was never built.
+    """
+    entry = MANIFEST.get(src)
+    if entry is None:
+        return Markup('<img src="%s" class="%s" alt="%s">') % (asset_url(f"img/{src}"), class_, alt)
+
+    def srcset(variants):
+        return ", ".join(
+            f'{url_for("static", filename="build/img/" + v["file"])} {v["width"]}w' for v in variants
+        )
+
+    html = ["<picture>"]
+    for _, _, mimetype, _ in FORMATS[:-1]:
+        if mimetype in entry["variants"]:
+            html.append(f'<source type="{mimetype}" srcset="{srcset(entry["variants"][mimetype])}" sizes="{escape(sizes)}">')
+    fallback = entry["variants"]["image/jpeg"]
+    html.append(
+        f'<img src="{url_for("static", filename="build/img/" + fallback[-1]["file"])}"'
+        f' srcset="{srcset(fallback)}" sizes="{escape(sizes)}" width="{entry["width"]}" height="{entry["height"]}"'
+        f' class="{escape(class_)}" alt="{escape(alt)}" loading="lazy" decoding="async">'
+    )
+    html.append("</picture>")
+    return Markup("".join(html))
+
+
+@app.cli.command("build-images")
+@click.option("--jobs", type=int, default=None, help="Worker processes (default: CPU count).")
+def build_images_command(jobs):
+    """Build responsive image derivatives and their manifest."""
+    manifest = build(jobs=jobs)
+    click.echo(f"{len(manifest)} images in {MANIFEST_PATH}")
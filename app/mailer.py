@@ -0,0 +1,214 @@
+"""
+Outbound contact email.
+
+contact() only puts the message in a spool table of the local store and returns;
+a background sender thread in each worker delivers it in batches over pooled SMTP
+sessions (app/smtp_pool.py), retrying with exponential backoff. A message is
+leased while being sent, and the lease is renewed right before each message of
+a batch goes out: a sender whose lease expired (a slow batch) finds the message
+taken over and skips it, so two workers never deliver it twice.
+"""
+
+import logging
+import os
+import smtplib
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from app import store
+from app.smtp_pool import SMTPPool
+
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") != "0"
+SMTP_TIMEOUT = 20
+
+STORE_NAME = "mail.sqlite3"
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30        # seconds, doubled on every failed attempt
+BACKOFF_MAX = 3600
+# a claimed message is invisible to other senders this long: longer than one sendmail, whose MAIL, RCPT,
+# DATA and message each wait at most SMTP_TIMEOUT (the handshake comes before the lease is renewed)
+LEASE = 6 * SMTP_TIMEOUT
+POLL_INTERVAL = 30
+
+
+class QueuedMail(NamedTuple):
+    id: int
+    sender: str
+    recipients: List[str]
+    message: str
+    attempts: int
+    leased_until: float
+
+
+class LeaseLost(Exception):
+    """
+    The lease of a message expired and another sender claimed it.
+    """
+
+
+class MailQueue:
+    """
+    Spool of outgoing messages persisted in the local store.
+    """
+
+    def __init__(self, store_name: str = STORE_NAME):
+        self._store_name = store_name
+
+    def _db(self):
+        db = store.connect(self._store_name)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS mail ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, recipients TEXT, message TEXT,"
+            " attempts INTEGER DEFAULT 0, next_attempt REAL, status TEXT DEFAULT 'pending', error TEXT)"
+        )
+        return db
+
+    def put(self, sender: str, recipients: List[str], message: str) -> int:
+        cursor = self._db().execute(
+            "INSERT INTO mail (sender, recipients, message, next_attempt) VALUES (?, ?, ?, ?)",
+            (sender, ",".join(recipients), message, time.time()),
+        )
+        return cursor.lastrowid
+
+    def claim(self, limit: int = 10, now: Optional[float] = None) -> List[QueuedMail]:
+        """
+        Lease up to `limit` messages that are due.
+        """
+        now = time.time() if now is None else now
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT id, sender, recipients, message, attempts FROM mail"
+                " WHERE status = 'pending' AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            db.executemany(
+                "UPDATE mail SET next_attempt = ? WHERE id = ?", [(now + LEASE, row[0]) for row in rows]
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return [QueuedMail(row[0], row[1], row[2].split(","), row[3], row[4], now + LEASE) for row in rows]
+
+    def renew(self, mail: QueuedMail, now: Optional[float] = None) -> QueuedMail:
+        """
+        Extend the lease of `mail` before sending it; raises LeaseLost if it is no longer ours.
+        """
+        now = time.time() if now is None else now
+        renewed = self._db().execute(
+            "UPDATE mail SET next_attempt = ? WHERE id = ? AND status = 'pending' AND next_attempt = ?",
+            (now + LEASE, mail.id, mail.leased_until),
+        ).rowcount
+        if not renewed:
+            raise LeaseLost(f"Email {mail.id} was claimed by another sender")
+        return mail._replace(leased_until=now + LEASE)
+
+    def done(self, mail_id: int):
+        self._db().execute("DELETE FROM mail WHERE id = ?", (mail_id,))
+
+    def retry(self, mail: QueuedMail, error: str, now: Optional[float] = None):
+        """
+        Schedule another attempt with exponential backoff, or give up after MAX_ATTEMPTS.
+        """
+        now = time.time() if now is None else now
+        attempts = mail.attempts + 1
+        status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+        delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+        self._db().execute(
+            "UPDATE mail SET attempts = ?, next_attempt = ?, status = ?, error = ? WHERE id = ?",
+            (attempts, now + delay, status, error, mail.id),
+        )
+        return status
+
+    def count(self, status: str = "pending") -> int:
+        return self._db().execute("SELECT COUNT(*) FROM mail WHERE status = ?", (status,)).fetchone()[0]
+
+
+class Sender(threading.Thread):
+    """
+    Background thread draining the queue of the current worker.
+    """
+
+    def __init__(self, queue: MailQueue, pool: SMTPPool):
+        super().__init__(name="mail-sender", daemon=True)
+        self.queue = queue
+        self.pool = pool
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def drain(self) -> int:
+        """
+        Try every due message once; returns how many were attempted.
+        """
+        attempted = 0
+        while True:
+            batch = self.queue.claim()
+            if not batch:
+                return attempted
+            attempted += len(batch)
+            for mail, error in zip(batch, self.pool.send_batch(batch, before_send=self.queue.renew)):
+                if error is None:
+                    self.queue.done(mail.id)
+                    continue
+                if isinstance(error, LeaseLost):
+                    logger.warning("%s, not sending it", error)
+                    continue
+                if isinstance(error, smtplib.SMTPAuthenticationError):
+                    logger.error("SMTP auth failed (Gmail). Likely need an App Password.")
+                else:
+                    logger.error("SMTP error while sending email %s: %r", mail.id, error)
+                if self.queue.retry(mail, repr(error)) == "failed":
+                    logger.error("Giving up on email %s after %s attempts", mail.id, MAX_ATTEMPTS)
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+                self.pool.keepalive()
+            except Exception:
+                logger.exception("Mail sender loop failed")
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+
+
+queue = MailQueue()
+pool = SMTPPool(SMTP_HOST, SMTP_PORT, starttls=SMTP_STARTTLS, timeout=SMTP_TIMEOUT)
+_sender: Optional[Sender] = None
+_sender_pid: Optional[int] = None
+_sender_lock = threading.Lock()
+
+
+def start_sender() -> Sender:
+    """
+    Start the sender of this process (threads do not survive a gunicorn fork).
+
+    Called by every gunicorn worker once it has booted (gunicorn.conf.py), then again by `enqueue`.
+    """
+    global _sender, _sender_pid
+    with _sender_lock:
+        if _sender is None or _sender_pid != os.getpid() or not _sender.is_alive():
+            _sender = Sender(queue, pool)
+            _sender_pid = os.getpid()
+            _sender.start()
+    return _sender
+
+
+def enqueue(sender: str, recipients: List[str], message: str) -> int:
+    mail_id = queue.put(sender, recipients, message)
+    start_sender().wake()
+    return mail_id
@@ -0,0 +1,155 @@
+"""
+Request metrics and Server-Timing.
+
+Every request is timed into a per-endpoint latency histogram (its count is the
+throughput) and counted in an in-flight gauge while it runs. Code that waits on
+something measures it with `timed(phase)` ("template", "spool", "backend", ...):
+the phase goes into its own histogram and, within a request, into the
+Server-Timing header of the response. SMTP itself happens in the mail sender,
+outside any request, as "smtp_handshake" and "smtp_send". Caches report hits
+and misses with `cache_result`, and endpoints that turn requests away count
+them with `admission_result`.
+
+Metrics are Prometheus collectors (prometheus_client, optional: without it only
+Server-Timing is emitted). Under gunicorn, gunicorn.conf.py points
+prometheus_multiproc_dir to a directory shared by the workers, and /metrics
+aggregates all of them. Set METRICS_TOKEN to require it as a bearer token.
+"""
+
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from flask import Flask, Response, abort, g, has_request_context, request
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+
+MULTIPROC_DIR = os.environ.get("prometheus_multiproc_dir")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# from a fraction of a millisecond (cached pages) to the SMTP and InfluxDB timeouts
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+if prometheus_client is not None:
+    REQUEST_SECONDS = Histogram(
+        "http_request_duration_seconds", "Request latency by endpoint", ["endpoint", "method", "status"],
+        buckets=BUCKETS,
+    )
+    IN_FLIGHT = Gauge(
+        "http_requests_in_flight", "Requests being served", ["endpoint"], multiprocess_mode="livesum"
+    )
+    PHASE_SECONDS = Histogram("phase_duration_seconds", "Time spent by phase", ["phase"], buckets=BUCKETS)
+    CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by result", ["cache", "result"])
+    ADMISSIONS = Counter("admissions_total", "Submissions by admission outcome", ["endpoint", "outcome"])
+
+
+def observe(phase: str, seconds: float):
+    if prometheus_client is not None:
+        PHASE_SECONDS.labels(phase).observe(seconds)
+    if has_request_context():
+        timings = g.setdefault("server_timing", {})
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Time the block as `phase` (added up if the phase repeats within a request).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(phase, time.perf_counter() - started)
+
+
+def cache_result(cache: str, result: str):
+    """
+    Count a lookup in `cache`: "hit", "miss", or where it was found (e.g. "store").
+    """
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, result).inc()
+
+
+def admission_result(endpoint: str, outcome: str):
+    """
+    Count a submission to `endpoint`: "admitted", or why it was turned away before doing any work.
+    """
+    if prometheus_client is not None:
+        ADMISSIONS.labels(endpoint, outcome).inc()
+
+
+def server_timing(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    entries = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def _endpoint() -> str:
+    return request.endpoint or "unmatched"
+
+
+def _before():
+    g.metrics_started = time.perf_counter()
+    g.metrics_status = 500
+    if prometheus_client is not None:
+        IN_FLIGHT.labels(_endpoint()).inc()
+
+
+def _after(response: Response) -> Response:
+    g.metrics_status = response.status_code
+    started = g.get("metrics_started")
+    if started is not None:
+        response.headers["Server-Timing"] = server_timing(
+            g.get("server_timing", {}), time.perf_counter() - started
+        )
+    return response
+
+
+def _teardown(_error=None):
+    # runs even when the view raised, so the gauge always comes back down
+    started = g.pop("metrics_started", None)
+    if started is None or prometheus_client is None:
+        return
+    endpoint = _endpoint()
+    IN_FLIGHT.labels(endpoint).dec()
+    REQUEST_SECONDS.labels(endpoint, request.method, str(g.get("metrics_status", 500))).observe(
+        time.perf_counter() - started
+    )
+
+
+def registry():
+    if MULTIPROC_DIR:
+        collected = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collected, path=MULTIPROC_DIR)
+        return collected
+    return prometheus_client.REGISTRY
+
+
+def metrics_view():
+    if prometheus_client is None:
+        abort(404)
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        abort(401)
+    return Response(prometheus_client.generate_latest(registry()), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_app(flask_app: Flask):
+    """
+    Time every request of `flask_app` and serve the metrics at /metrics.
+    """
+    flask_app.before_request(_before)
+    flask_app.after_request(_after)
+    flask_app.teardown_request(_teardown)
+    flask_app.add_url_rule("/metrics", "metrics", metrics_view)
+    return flask_app
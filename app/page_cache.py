@@ -0,0 +1,187 @@
+"""
+Rendered landing page cache.
+
+The landing pages only change once a day (age and year counters) or on deploy,
+so the rendered bytes are kept in memory per (lang, date) and shared with the
+other gunicorn workers through the local store. A hit never touches Jinja.
+The brotli/gzip encodings of a page are compressed once and cached the same way.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from flask import Response, request
+
+from app import compression, metrics, store
+
+
+STORE_NAME = "pages.sqlite3"
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: float
+
+
+def sources_version(*paths: str) -> str:
+    """
+    Digest of the page sources (templates, strings, manifests): a deploy that changes them gets fresh pages.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in sorted(os.walk(path)):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        elif os.path.exists(path):
+            files.append(path)
+
+    digest = hashlib.sha1()
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class PageCache:
+    """
+    Cache of rendered pages keyed by (lang, date), invalidated at local midnight.
+    """
+
+    def __init__(self, render: Callable[[str], str], version: str = ""):
+        self._render = render
+        self._version = version
+        self._pages: Dict[Tuple[str, date], CachedPage] = {}
+        self._encoded: Dict[Tuple[str, date, str], bytes] = {}
+        self._day: Optional[date] = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        db = store.connect(STORE_NAME)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " lang TEXT, day TEXT, version TEXT, body BLOB, etag TEXT, last_modified REAL,"
+            " PRIMARY KEY (lang, day, version))"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS encoded_pages ("
+            " lang TEXT, day TEXT, version TEXT, encoding TEXT, body BLOB,"
+            " PRIMARY KEY (lang, day, version, encoding))"
+        )
+        return db
+
+    def _roll_day(self, today: date):
+        # local midnight: yesterday's pages are gone for every worker
+        self._pages.clear()
+        self._encoded.clear()
+        self._day = today
+        db = self._db()
+        db.execute("DELETE FROM pages WHERE day != ?", (today.isoformat(),))
+        db.execute("DELETE FROM encoded_pages WHERE day != ?", (today.isoformat(),))
+
+    def _load(self, lang: str, today: date) -> Optional[CachedPage]:
+        row = self._db().execute(
+            "SELECT body, etag, last_modified FROM pages WHERE lang = ? AND day = ? AND version = ?",
+            (lang, today.isoformat(), self._version),
+        ).fetchone()
+        return CachedPage(bytes(row[0]), row[1], row[2]) if row else None
+
+    def _build(self, lang: str, today: date) -> CachedPage:
+        body = self._render(lang).encode("utf-8")
+        page = CachedPage(body, hashlib.sha1(body).hexdigest(), int(time.time()))
+        self._db().execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+            (lang, today.isoformat(), self._version, page.body, page.etag, page.last_modified),
+        )
+        return page
+
+    def get(self, lang: str) -> CachedPage:
+        today = date.today()
+        page = self._pages.get((lang, today))
+        if page is not None:
+            metrics.cache_result("pages", "hit")
+            return page
+
+        with self._lock:
+            if self._day != today:
+                self._roll_day(today)
+            page = self._pages.get((lang, today))
+            if page is not None:
+                metrics.cache_result("pages", "hit")
+            else:
+                page = self._load(lang, today)
+                if page is not None:
+                    metrics.cache_result("pages", "store")
+                else:
+                    metrics.cache_result("pages", "miss")
+                    page = self._build(lang, today)
+                self._pages[(lang, today)] = page
+        return page
+
+    def encoded(self, lang: str, encoding: str) -> bytes:
+        """
+        The page compressed with `encoding` ("br" or "gzip"), compressed once per page.
+        """
+        page = self.get(lang)
+        key = (lang, self._day, encoding)
+        body = self._encoded.get(key)
+        if body is not None:
+            return body
+
+        day = key[1].isoformat()
+        db = self._db()
+        row = db.execute(
+            "SELECT body FROM encoded_pages WHERE lang = ? AND day = ? AND version = ? AND encoding = ?",
+            (lang, day, self._version, encoding),
+        ).fetchone()
+        if row:
+            body = bytes(row[0])
+        else:
+            body = compression.compress(page.body, encoding)
+            db.execute(
+                "INSERT OR REPLACE INTO encoded_pages VALUES (?, ?, ?, ?, ?)",
+                (lang, day, self._version, encoding, body),
+            )
+        self._encoded[key] = body
+        return body
+
+    def warm(self, langs: Iterable[str]):
+        """
+        Render every language up front (e.g. before gunicorn forks).
+        """
+        for lang in langs:
+            for encoding in compression.ENCODINGS:
+                self.encoded(lang, encoding)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._encoded.clear()
+            self._day = None
+            db = self._db()
+            db.execute("DELETE FROM pages")
+            db.execute("DELETE FROM encoded_pages")
+
+    def response(self, lang: str) -> Response:
+        """
+        Serve the cached page, compressed if the client accepts it, answering conditional requests with a 304.
+        """
+        page = self.get(lang)
+        encoding = compression.negotiate() if len(page.body) >= compression.MIN_SIZE else None
+        if encoding is None:
+            response = Response(page.body, mimetype="text/html")
+            response.set_etag(page.etag)
+        else:
+            response = Response(self.encoded(lang, encoding), mimetype="text/html")
+            response.content_encoding = encoding
+            # each representation needs its own strong validator
+            response.set_etag(f"{page.etag}-{encoding}")
+        response.vary.add("Accept-Encoding")
+        response.last_modified = page.last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
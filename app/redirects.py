@@ -0,0 +1,100 @@
+"""
+Host/scheme redirects, ahead of Flask.
+
+The canonical-host, tomscotti landing and force-HTTPS rules are a declarative
+table applied by a small WSGI middleware wrapped around `app.wsgi_app`, so a
+redirect never builds a Flask request or goes through routing, and requests for
+static files skip the checks entirely. Redirect responses are prebuilt; only the
+Location of the path-preserving ones is filled in per request.
+"""
+
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from app import app, metrics
+
+
+class Redirect(NamedTuple):
+    host: str
+    # None: any path, kept in the Location; otherwise only these paths, sent to `target` as is
+    paths: Optional[FrozenSet[str]]
+    target: str
+    status: int
+
+
+REDIRECTS: Tuple[Redirect, ...] = (
+    # canonical www
+    Redirect("tommasoscotti.com", None, "https://www.tommasoscotti.com", 301),
+    Redirect("tomscotti.com", None, "https://www.tomscotti.com", 301),
+    # tomscotti lands on English, but only from / (so /jp stays /jp)
+    Redirect("www.tomscotti.com", frozenset({"/", "/index"}), "https://www.tomscotti.com/en", 302),
+)
+
+STATUS = {301: "301 Moved Permanently", 302: "302 Found"}
+# characters kept as is when the request path goes back into a Location
+PATH_SAFE = "/%:@!$&'()*+,;=~"
+
+Headers = List[Tuple[str, str]]
+
+
+def _location(base: str, environ: dict) -> str:
+    path = quote(environ.get("PATH_INFO", "").encode("latin-1") or b"/", safe=PATH_SAFE)
+    query = environ.get("QUERY_STRING")
+    return f"{base}{path}?{query}" if query else f"{base}{path}"
+
+
+class RedirectMiddleware:
+    """
+    WSGI middleware answering the REDIRECTS (and plain-http requests, with `force_https`) itself.
+    """
+
+    def __init__(self, wsgi_app: Callable, redirects: Iterable[Redirect] = REDIRECTS, force_https: bool = True,
+                 bypass: Tuple[str, ...] = ("/static/",)):
+        self.wsgi_app = wsgi_app
+        self.force_https = force_https
+        self.bypass = bypass
+        self._by_host: Dict[str, List[Tuple[Redirect, Optional[Headers]]]] = {}
+        for rule in redirects:
+            headers = None if rule.paths is None else self._headers(rule.target)
+            self._by_host.setdefault(rule.host, []).append((rule, headers))
+
+    @staticmethod
+    def _headers(location: str) -> Headers:
+        return [("Location", location), ("Content-Type", "text/plain"), ("Content-Length", "0")]
+
+    def match(self, environ: dict) -> Optional[Tuple[str, Headers]]:
+        """
+        (status, headers) of the redirect for `environ`, None to let the app handle it.
+        """
+        path = environ.get("PATH_INFO") or "/"
+        if path.startswith(self.bypass):
+            return None
+
+        raw_host = environ.get("HTTP_HOST") or environ.get("SERVER_NAME", "")
+        host = raw_host.lower().split(":")[0]
+        for rule, headers in self._by_host.get(host, ()):
+            if rule.paths is None:
+                return STATUS[rule.status], self._headers(_location(rule.target, environ))
+            if path in rule.paths:
+                return STATUS[rule.status], headers
+
+        if self.force_https:
+            proto = environ.get("HTTP_X_FORWARDED_PROTO") or environ.get("wsgi.url_scheme")
+            if proto != "https":
+                return STATUS[301], self._headers(_location(f"https://{raw_host}", environ))
+        return None
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        redirect = self.match(environ)
+        elapsed = time.perf_counter() - started
+        metrics.observe("redirect", elapsed)
+        if redirect is None:
+            return self.wsgi_app(environ, start_response)
+        status, headers = redirect
+        start_response(status, list(headers) + [("Server-Timing", metrics.server_timing({"redirect": elapsed}))])
+        return [b""]
+
+
+app.wsgi_app = RedirectMiddleware(app.wsgi_app, force_https=app.env != "development")
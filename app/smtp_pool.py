@@ -0,0 +1,220 @@
+"""
+Pool of authenticated SMTP sessions.
+
+A session costs a TCP connect, EHLO, STARTTLS and AUTH before the first byte of
+mail goes out, so the sender keeps a few of them open: idle sessions are pinged
+with NOOP and replaced when the server has dropped them or they are too old.
+Queued messages are sent in batches over one session.
+"""
+
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Sequence
+
+from app import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Session(NamedTuple):
+    smtp: smtplib.SMTP
+    created: float
+    last_used: float
+
+
+def _is_session_error(error: Exception) -> bool:
+    # SMTPException derives from OSError: only a dropped connection or a socket error kills the session,
+    # a refused sender/recipient does not
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+class SMTPPool:
+    """
+    Bounded pool of SMTP sessions with NOOP keepalives and handshake/send timings.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        starttls: bool = True,
+        size: int = 2,
+        timeout: float = 20,
+        keepalive: float = 30,
+        max_age: float = 300,
+    ):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.timeout = timeout
+        self.keepalive_after = keepalive
+        self.max_age = max_age
+        self._idle: Deque[_Session] = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "handshakes": 0,
+            "handshake_seconds": 0.0,
+            "sends": 0,
+            "send_seconds": 0.0,
+            "noops": 0,
+            "reconnects": 0,
+        }
+
+    def _count(self, name: str, value: float = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_handshake_seconds"] = stats["handshake_seconds"] / (stats["handshakes"] or 1)
+        stats["avg_send_seconds"] = stats["send_seconds"] / (stats["sends"] or 1)
+        return stats
+
+    def _connect(self) -> _Session:
+        started = time.perf_counter()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            smtp_user = os.environ.get("EMAIL")
+            if smtp_user and smtp.has_extn("auth"):
+                smtp.login(smtp_user, os.environ.get("PASSWORD"))
+        except Exception:
+            smtp.close()
+            raise
+        elapsed = time.perf_counter() - started
+        self._count("handshakes")
+        self._count("handshake_seconds", elapsed)
+        metrics.observe("smtp_handshake", elapsed)
+        now = time.time()
+        return _Session(smtp, now, now)
+
+    @staticmethod
+    def _close(session: _Session):
+        try:
+            session.smtp.quit()
+        except Exception:
+            session.smtp.close()
+
+    def _alive(self, session: _Session, now: float) -> bool:
+        if now - session.created > self.max_age:
+            return False
+        if now - session.last_used < self.keepalive_after:
+            return True
+        try:
+            self._count("noops")
+            return session.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> _Session:
+        now = time.time()
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._connect()
+            if self._alive(session, now):
+                return session
+            self._count("reconnects")
+            self._close(session)
+
+    @contextmanager
+    def session(self):
+        """
+        Borrow a live session; it goes back to the pool unless the connection broke.
+        """
+        self._slots.acquire()
+        try:
+            session = self._checkout()
+            try:
+                yield session.smtp
+            except Exception as error:
+                if _is_session_error(error):
+                    self._close(session)
+                else:
+                    self._release(session)
+                raise
+            else:
+                self._release(session)
+        finally:
+            self._slots.release()
+
+    def _release(self, session: _Session):
+        with self._lock:
+            self._idle.append(session._replace(last_used=time.time()))
+
+    def _send(self, smtp: smtplib.SMTP, mail):
+        started = time.perf_counter()
+        smtp.sendmail(mail.sender, mail.recipients, mail.message)
+        elapsed = time.perf_counter() - started
+        self._count("sends")
+        self._count("send_seconds", elapsed)
+        metrics.observe("smtp_send", elapsed)
+
+    def send_batch(self, mails: Sequence, before_send: Optional[Callable] = None) -> List[Optional[Exception]]:
+        """
+        Send `mails` over one session, reconnecting once if the server drops it.
+
+        `before_send(mail)` is called right before each message goes out; if it raises, the message
+        is not sent and the error is its result. Returns one entry per message: None if it was
+        sent, else the error.
+        """
+        results: List[Optional[Exception]] = []
+        pending = list(mails)
+        reconnected = False
+        while pending:
+            try:
+                with self.session() as smtp:
+                    while pending:
+                        try:
+                            if before_send is not None:
+                                before_send(pending[0])
+                            self._send(smtp, pending[0])
+                        except Exception as error:
+                            if _is_session_error(error):
+                                raise
+                            results.append(error)
+                        else:
+                            results.append(None)
+                        pending.pop(0)
+            except Exception as error:
+                if not _is_session_error(error) or reconnected:
+                    # handshake failed or the server keeps dropping us: the rest of the batch fails
+                    results.extend(error for _ in pending)
+                    break
+                logger.warning("SMTP session dropped, reconnecting")
+                self._count("reconnects")
+                reconnected = True
+        return results
+
+    def keepalive(self):
+        """
+        NOOP idle sessions and close the ones that are stale.
+        """
+        now = time.time()
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for session in idle:
+            if self._alive(session, now):
+                self._release(session)
+            else:
+                self._close(session)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for session in idle:
+            self._close(session)
@@ -0,0 +1,43 @@
+"""
+Small local store shared by the gunicorn workers of one dyno.
+
+Every store is a SQLite file under RUNTIME_DIR (read on every connect, so tests
+can point it at a temporary directory). Connections are cached per file,
+process and OS thread, so a connection opened in the master before fork is
+never reused by a worker. Under gevent the greenlets of a worker share their
+thread's connection: SQLite calls never yield, so they cannot interleave.
+"""
+
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Tuple
+
+try:
+    from gevent.monkey import get_original
+
+    # the real thread id, not the greenlet's, once threading is monkey-patched
+    _thread_id = get_original("_thread", "get_ident")
+except ImportError:
+    from threading import get_ident as _thread_id
+
+
+RUNTIME_DIR = os.environ.get("HOKUTHOM_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), "hokuthom")
+
+_conns: Dict[Tuple[int, int, str], sqlite3.Connection] = {}
+
+
+def connect(name: str) -> sqlite3.Connection:
+    """
+    Return the connection to the store file `name` (under RUNTIME_DIR unless absolute) for the current process/thread.
+    """
+    path = os.path.join(RUNTIME_DIR, name)
+    key = (os.getpid(), _thread_id(), path)
+    conn = _conns.get(key)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _conns[key] = conn
+    return conn
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import admission, app, store
+from app.admission import Admission, Limit
+
+
+FORM = {"email": "a@b.c", "message": "hello", "lang": "en"}
+ENV = {"EMAIL": "me@example.com", "PASSWORD": "x", "EMAIL_TO": "you@example.com"}
+
+
+class TestAdmission(unittest.TestCase):
+
+    def setUp(self):
+        # the buckets and digests of a site served from this host are left alone
+        runtime_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(runtime_dir.cleanup)
+        patch = mock.patch.object(store, "RUNTIME_DIR", runtime_dir.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.now = 1000.0
+        self.admission = Admission(store_name="test_admission.sqlite3", clock=lambda: self.now)
+
+    def test_token_bucket(self):
+        limit = Limit(capacity=2, per_second=0.5)
+        self.assertEqual(self.admission.take("ip:1", limit), 0)
+        self.assertEqual(self.admission.take("ip:1", limit), 0)
+        self.assertAlmostEqual(self.admission.take("ip:1", limit), 2)
+        self.assertEqual(self.admission.take("ip:2", limit), 0)
+
+        self.now += 1
+        self.assertAlmostEqual(self.admission.take("ip:1", limit), 1)
+        self.now += 1
+        self.assertEqual(self.admission.take("ip:1", limit), 0)
+        # never more than the capacity
+        self.now += 3600
+        for _ in range(2):
+            self.assertEqual(self.admission.take("ip:1", limit), 0)
+        self.assertGreater(self.admission.take("ip:1", limit), 0)
+
+    def test_shared_between_instances(self):
+        limit = Limit(capacity=1, per_second=0.01)
+        other = Admission(store_name="test_admission.sqlite3", clock=lambda: self.now)
+        self.assertEqual(self.admission.take("global", limit), 0)
+        self.assertGreater(other.take("global", limit), 0)
+
+    def test_duplicates_expire(self):
+        self.assertTrue(self.admission.reserve("a@b.c", "Hello  there", ttl=60))
+        self.assertFalse(self.admission.reserve("A@b.c", "hello there\n", ttl=60))
+        self.assertTrue(self.admission.reserve("a@b.c", "something else", ttl=60))
+        self.now += 61
+        self.assertTrue(self.admission.reserve("a@b.c", "hello there", ttl=60))
+
+    def test_released_message_can_be_reserved_again(self):
+        self.assertTrue(self.admission.reserve("a@b.c", "hello", ttl=60))
+        self.admission.release("a@b.c", "hello")
+        self.assertTrue(self.admission.reserve("a@b.c", "hello", ttl=60))
+
+    def test_one_reservation_among_concurrent_copies(self):
+        other = Admission(store_name="test_admission.sqlite3", clock=lambda: self.now)
+        results = []
+        threads = [threading.Thread(target=lambda a=a: results.append(a.reserve("a@b.c", "hello")))
+                   for a in (self.admission, other) * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [False] * 7 + [True])
+
+
+@mock.patch.dict(os.environ, ENV)
+@mock.patch("app.mailer.enqueue")
+class TestContactAdmission(unittest.TestCase):
+
+    def setUp(self):
+        runtime_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(runtime_dir.cleanup)
+        patch = mock.patch.object(store, "RUNTIME_DIR", runtime_dir.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.client = app.test_client()
+
+    def post(self, ip="203.0.113.1", **fields):
+        data = dict(FORM, ts=str(int((time.time() - 10) * 1000)), **fields)
+        return self.client.post(
+            "/contact", base_url="https://www.tommasoscotti.com", data=data,
+            headers={"X-Forwarded-Proto": "https", "X-Forwarded-For": f"10.0.0.1, {ip}"},
+        )
+
+    def test_per_ip_limit(self, enqueue):
+        statuses = [self.post(message=f"hello {i}").status_code for i in range(admission.PER_IP_LIMIT.capacity + 1)]
+        self.assertEqual(statuses, [202] * admission.PER_IP_LIMIT.capacity + [429])
+        self.assertIn("Retry-After", self.post(message="again").headers)
+        self.assertEqual(self.post(ip="203.0.113.2").status_code, 202)
+        self.assertEqual(enqueue.call_count, admission.PER_IP_LIMIT.capacity + 1)
+
+    def test_global_limit(self, enqueue):
+        with mock.patch.object(admission, "GLOBAL_LIMIT", Limit(2, 0.001)):
+            statuses = [self.post(ip=f"203.0.113.{i}", message=f"hello {i}").status_code for i in range(3)]
+        self.assertEqual(statuses, [202, 202, 429])
+
+    def test_duplicate_is_not_sent_again(self, enqueue):
+        self.assertEqual(self.post().status_code, 202)
+        self.assertEqual(self.post(ip="203.0.113.9").status_code, 202)
+        enqueue.assert_called_once()
+
+    def test_failed_message_can_be_sent_again(self, enqueue):
+        enqueue.side_effect = OSError("spool is full")
+        self.assertEqual(self.post().status_code, 500)
+        enqueue.side_effect = None
+        self.assertEqual(self.post().status_code, 202)
+        self.assertEqual(enqueue.call_count, 2)
+
+        with mock.patch.dict(os.environ, {"PASSWORD": ""}):
+            self.assertEqual(self.post(message="not configured").status_code, 500)
+        self.assertEqual(self.post(message="not configured").status_code, 202)
+        self.assertEqual(enqueue.call_count, 3)
+
+    def test_size_caps(self, enqueue):
+        self.assertEqual(self.post(message="x" * (admission.MAX_BODY + 1)).status_code, 413)
+        self.assertEqual(self.post(name="x" * 201).status_code, 413)
+        enqueue.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+
+from app import app, assets
+
+
+class TestAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def get(self, url):
+        return self.client.get(url, base_url="https://www.tommasoscotti.com")
+
+    def test_asset_url_is_fingerprinted(self):
+        with app.test_request_context():
+            url = assets.asset_url("css/style.css")
+            self.assertRegex(url, r"^/static/css/style\.[0-9a-f]{10}\.css$")
+            self.assertEqual(assets.asset_url("img/nope.png"), "/static/img/nope.png")
+
+    def test_hashed_url_is_immutable(self):
+        with app.test_request_context():
+            url = assets.asset_url("css/style.css")
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], assets.IMMUTABLE)
+        with open(f"{app.static_folder}/css/style.css", "rb") as f:
+            self.assertEqual(response.data, f.read())
+
+    def test_plain_url_keeps_default_caching(self):
+        response = self.get("/static/css/style.css")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response.headers.get("Cache-Control", ""))
+
+    def test_unknown_hash(self):
+        self.assertEqual(self.get("/static/css/style.0000000000.css").status_code, 404)
+
+    @unittest.skipIf(assets.BUILT is not None, "the manifest is built")
+    def test_hashed_url_from_another_worker(self):
+        with app.test_request_context():
+            url = assets.asset_url("css/style.css")
+        # a worker that has not rendered the page yet
+        with mock.patch.dict(assets.MANIFEST, clear=True), mock.patch.dict(assets.LOGICAL, clear=True):
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["Cache-Control"], assets.IMMUTABLE)
+            self.assertEqual(self.get(url.replace("style", "nope")).status_code, 404)
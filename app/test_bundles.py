@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+
+from app import bundles
+
+
+class TestBundles(unittest.TestCase):
+
+    def test_vlq(self):
+        self.assertEqual([bundles.vlq(v) for v in (0, 1, -1, 16, 123)], ["A", "C", "D", "gB", "2H"])
+
+    def test_rebase_css_urls(self):
+        css = 'a{background:url("../img/x.png")} b{src:url(fonts/f.woff2?v=1#f)} c{d:url(data:x)}'
+        rebased = bundles.rebase_css_urls(css, "vendor/lib/css/lib.css", "build/bundle.css")
+        self.assertIn('url("../vendor/lib/img/x.png")', rebased)
+        self.assertIn("url(../vendor/lib/css/fonts/f.woff2?v=1#f)", rebased)
+        self.assertIn("url(data:x)", rebased)
+
+    def test_minify_js_keeps_code_after_comments(self):
+        js = "/* header\n */\n  var a = 1;\n  // note\n  /* x */ b();\n"
+        self.assertEqual(bundles.minify_lines(js, "js"), [(2, 2, "var a = 1;"), (4, 10, "b();")])
+
+    def test_build_bundle(self):
+        with tempfile.TemporaryDirectory() as static:
+            for name, text in (("a.js", "var a = 1;\n\n  a++\n"), ("b.min.js", "b()\n//# sourceMappingURL=b.map\n")):
+                with open(os.path.join(static, name), "w") as f:
+                    f.write(text)
+            code, source_map = bundles.build_bundle("build/bundle.js", ["a.js", "b.min.js"], static)
+
+        self.assertEqual(code, "var a = 1;\na++\n;\nb()\n;\n//# sourceMappingURL=bundle.js.map\n")
+        self.assertEqual(source_map["sources"], ["../a.js", "../b.min.js"])
+        self.assertEqual(source_map["mappings"].split(";"), ["AAAA", "AAEE", "", "ACFF", ""])
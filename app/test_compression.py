@@ -0,0 +1,60 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from app import app, compression
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = self.tmp.name
+        os.makedirs(os.path.join(self.static, "css"))
+        self.css = b".a { color: red; }\n" * 200
+        with open(os.path.join(self.static, "css", "site.css"), "wb") as f:
+            f.write(self.css)
+        with open(os.path.join(self.static, "css", "tiny.css"), "wb") as f:
+            f.write(b".b{}")
+        with open(os.path.join(self.static, "logo.png"), "wb") as f:
+            f.write(os.urandom(4096))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_and_scan(self):
+        totals = compression.build(self.static)
+        self.assertEqual(totals["files"], 1)
+        self.assertEqual(compression.scan(self.static), {"css/site.css": compression.ENCODINGS})
+        with open(os.path.join(self.static, "css", "site.css.gz"), "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), self.css)
+
+    def test_negotiate(self):
+        with app.test_request_context(headers={"Accept-Encoding": "gzip, deflate, br"}):
+            self.assertEqual(compression.negotiate(), compression.ENCODINGS[0])
+            self.assertEqual(compression.negotiate(("gzip",)), "gzip")
+        with app.test_request_context(headers={"Accept-Encoding": "gzip;q=0, identity"}):
+            self.assertIsNone(compression.negotiate(("gzip",)))
+        with app.test_request_context():
+            self.assertIsNone(compression.negotiate())
+
+    def test_send_static(self):
+        compression.build(self.static)
+        precompressed = compression.scan(self.static)
+        with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            response = compression.send_static("css/site.css", self.static, precompressed)
+            response.direct_passthrough = False
+            self.assertEqual(response.content_encoding, "gzip")
+            self.assertEqual(response.mimetype, "text/css")
+            self.assertEqual(gzip.decompress(response.get_data()), self.css)
+            self.assertIn("Accept-Encoding", response.vary)
+        with app.test_request_context():
+            response = compression.send_static("css/site.css", self.static, precompressed)
+            response.direct_passthrough = False
+            self.assertIsNone(response.content_encoding)
+            self.assertEqual(response.get_data(), self.css)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import urllib.error
+from unittest import mock
+
+from app import app, assets, critical_css, fonts, i18n
+
+HTML = '<header id="header"><nav class="nav-menu"><ul><li><a class="icofont-twitter" href="#">x</a></li></ul></nav></header>'
+
+CSS = """
+@charset "UTF-8";
+@font-face { font-family: "IcoFont"; src: url(icofont.woff2); }
+@font-face { font-family: "Unused"; src: url(unused.woff2); }
+/* comment { } */
+#header .nav-menu a:hover { color: red; }
+.icofont-twitter:before { content: "\\ed7a"; font-family: IcoFont; }
+[class^="icofont-"] { speak: none; }
+[class^="bx-"] { speak: none; }
+.testimonials .owl-dot { color: blue; }
+@media (min-width: 768px) {
+  .nav-menu > ul { display: flex; }
+  .portfolio { display: none; }
+}
+@media print { .portfolio { display: none; } }
+"""
+
+
+class TestCriticalCss(unittest.TestCase):
+
+    def test_parse(self):
+        blocks = critical_css.parse(CSS)
+        self.assertEqual(blocks[0][0], "@font-face")
+        media = [body for prelude, body in blocks if prelude.startswith("@media")]
+        self.assertEqual([prelude for prelude, _ in media[0]], [".nav-menu > ul", ".portfolio"])
+
+    def test_extract(self):
+        critical = critical_css.extract(CSS, HTML)
+        self.assertIn("#header .nav-menu a:hover{color: red;}", critical)
+        self.assertIn(".icofont-twitter:before", critical)
+        self.assertIn('[class^="icofont-"]', critical)
+        self.assertIn("@media (min-width: 768px){.nav-menu > ul{display: flex;}}", critical)
+        self.assertIn("IcoFont", critical)
+
+        self.assertNotIn("bx-", critical)
+        self.assertNotIn("owl-dot", critical)
+        self.assertNotIn("portfolio", critical)
+        self.assertNotIn("print", critical)
+        self.assertNotIn("Unused", critical)
+
+    def test_render_blocking_bytes(self):
+        with app.test_request_context():
+            href = assets.asset_url("css/style.css")
+        page = (
+            '<html><head><link href="https://fonts.example/css" rel="stylesheet">'
+            f'<link rel="preload" href="{href}" as="style"><noscript><link href="{href}" rel="stylesheet"></noscript>'
+            '<link href="/static/css/print.css" rel="stylesheet" media="print">'
+            '</head><body><link href="https://fonts.example/late" rel="stylesheet"></body></html>'
+        )
+        fetched = []
+        fetch = lambda url: fetched.append(url) or b"x" * 100  # noqa: E731
+        self.assertEqual(critical_css.render_blocking_bytes(page, fetch), (100, []))
+        self.assertEqual(fetched, ["https://fonts.example/css"])
+
+        blocking = page.replace('rel="preload"', 'rel="stylesheet"')
+        size = os.path.getsize(f"{app.static_folder}/css/style.css")
+        self.assertEqual(critical_css.render_blocking_bytes(blocking, fetch), (100 + size, []))
+
+        def offline(url):
+            raise urllib.error.URLError("no network")
+        self.assertEqual(critical_css.render_blocking_bytes(blocking, offline), (size, ["https://fonts.example/css"]))
+
+    def test_build_offline(self):
+        def offline(url):
+            raise urllib.error.URLError("no network")
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(critical_css, "CRITICAL_DIR", tmp), \
+                mock.patch.object(critical_css, "REPORT_PATH", os.path.join(tmp, "report.json")), \
+                mock.patch.dict(critical_css.CRITICAL), mock.patch.object(fonts, "WEB_FONTS_BUILT", False):
+            report = critical_css.build(fetch=offline)
+            self.assertEqual(sorted(os.listdir(tmp)), sorted([f"{lang}.css" for lang in i18n.LANGS] + ["report.json"]))
+        for sizes in report.values():
+            self.assertEqual(sizes["unmeasured"], [fonts.GOOGLE_FONTS_URL])
+            self.assertLess(sizes["render_blocking_bytes_after"], sizes["render_blocking_bytes_before"])
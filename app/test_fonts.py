@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import app, fonts
+
+CSS = """
+@font-face { font-family: "IcoFont"; src: url(fonts/icofont.eot); src: url(fonts/icofont.woff2) format("woff2"); }
+[class*=" icofont-"], [class^="icofont-"] { font-family: IcoFont !important; }
+.icofont-twitter:before { content: "\\ed7a"; }
+.icofont-close:before, .icofont-close-line:before { content: "\\eee4"; }
+.icofont-facebook:before { content: "\\ed37"; }
+.icofont-2x { font-size: 2em; }
+"""
+
+
+class TestFonts(unittest.TestCase):
+
+    def test_used_icon_classes(self):
+        used = fonts.used_icon_classes([
+            '<i class="icofont-twitter"></i><i class="bx bx-chevron-right"></i><a class="bri-x">',
+            "$('.mobile-nav-toggle i').toggleClass('icofont-navigation-menu icofont-close');",
+        ])
+        self.assertEqual(used, {"icofont-twitter", "bx-chevron-right", "icofont-navigation-menu", "icofont-close"})
+
+    def test_trim_stylesheet(self):
+        css, codepoints = fonts.trim_stylesheet(CSS, "icofont.woff2", {"icofont-twitter", "icofont-close"})
+        self.assertEqual(codepoints, {0xED7A, 0xEEE4})
+        self.assertTrue(css.startswith('@font-face{font-family:"IcoFont";font-display:swap;src:url(icofont.woff2)'))
+        self.assertIn('[class^="icofont-"]', css)
+        self.assertIn(".icofont-close:before{", css)
+        self.assertIn(".icofont-2x{", css)
+        self.assertNotIn("icofont-close-line", css)
+        self.assertNotIn("facebook", css)
+
+    def test_subset_font(self):
+        try:
+            import fontTools  # noqa: F401
+            import brotli  # noqa: F401
+        except ImportError:
+            self.skipTest("fontTools/brotli not installed")
+
+        source = os.path.join(app.static_folder, fonts.ICON_FONTS["icofont"][1])
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, "icofont.woff2")
+            fonts.subset_font(source, target, {0xED7A})
+            self.assertLess(os.path.getsize(target), os.path.getsize(source) / 20)
+
+    def test_web_fonts_fallback(self):
+        with mock.patch.object(fonts, "WEB_FONTS_BUILT", False):
+            html = fonts.web_fonts()
+        self.assertIn("fonts.googleapis.com/css2?family=Open+Sans:ital,wght@0,400;0,600;0,700;1,400", html)
+        self.assertIn("display=swap", html)
+
+        with mock.patch.object(fonts, "WEB_FONTS_BUILT", True), app.test_request_context():
+            html = fonts.web_fonts()
+        self.assertRegex(html, r'^<link href="/static/build/fonts/fonts(\.[0-9a-f]{10})?\.css" rel="stylesheet">$')
+        self.assertNotIn("googleapis", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
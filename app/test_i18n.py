@@ -0,0 +1,25 @@
+import unittest
+from unittest import mock
+
+from app import i18n
+
+
+class TestI18n(unittest.TestCase):
+
+    def test_unknown_lang_is_italian(self):
+        self.assertIs(i18n.translations("fr"), i18n.CATALOG["it"])
+        self.assertIs(i18n.translations(None), i18n.CATALOG["it"])
+        self.assertIs(i18n.translations("EN"), i18n.CATALOG["en"])
+
+    def test_read_only(self):
+        with self.assertRaises(TypeError):
+            i18n.translations("en")["site_name"] = "x"
+
+    def test_missing_keys_fall_back_to_italian(self):
+        def load(lang):
+            return {"a": "it-a", "b": "it-b"} if lang == "it" else {"a": f"{lang}-a"}
+
+        with mock.patch.object(i18n, "_load", load):
+            catalog = i18n._build()
+        self.assertEqual(catalog["jp"]["a"], "jp-a")
+        self.assertEqual(catalog["jp"]["b"], "it-b")
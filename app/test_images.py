@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import app, images
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed to build the derivatives
+    Image = None
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class TestImages(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, "img")
+        self.output = os.path.join(tmp.name, "build")
+        self.manifest = os.path.join(tmp.name, "images.json")
+        os.makedirs(os.path.join(self.source, "sub"))
+        Image.new("RGB", (800, 400), "red").save(os.path.join(self.source, "sub", "red.png"))
+
+    def build(self):
+        return images.build(self.source, self.output, self.manifest, jobs=1)
+
+    def test_build_variants(self):
+        entry = self.build()["sub/red.png"]
+        self.assertEqual((entry["width"], entry["height"]), (800, 400))
+        jpegs = entry["variants"]["image/jpeg"]
+        self.assertEqual([v["width"] for v in jpegs], [320, 640, 800])
+        self.assertTrue(all(v["file"].startswith(entry["hash"]) for v in jpegs))
+        self.assertTrue(os.path.exists(os.path.join(self.output, jpegs[0]["file"])))
+
+    def test_skips_unchanged_sources(self):
+        self.build()
+        with mock.patch.object(images, "derive") as derive:
+            self.build()
+        derive.assert_not_called()
+
+    def test_picture(self):
+        with mock.patch.dict(images.MANIFEST, self.build()), app.test_request_context():
+            html = images.picture("sub/red.png", alt="red", sizes="50vw")
+            fallback = images.picture("missing.jpg", alt="x")
+        self.assertTrue(html.startswith("<picture>"))
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('alt="red"', html)
+        self.assertEqual(fallback, '<img src="/static/img/missing.jpg" class="" alt="x">')
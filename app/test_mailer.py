@@ -0,0 +1,145 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import app, mailer, store
+from app.smtp_pool import SMTPPool
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.handlers import Sink
+except ImportError:  # optional test dependency
+    Controller = None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+if Controller is not None:
+    class Inbox(Sink):
+
+        def __init__(self):
+            self.messages = []
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope)
+            return "250 OK"
+else:
+    Inbox = None
+
+
+@unittest.skipIf(Controller is None, "aiosmtpd is not installed")
+class TestMailer(unittest.TestCase):
+
+    def setUp(self):
+        runtime_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(runtime_dir.cleanup)
+        patch = mock.patch.object(store, "RUNTIME_DIR", runtime_dir.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.inbox = Inbox()
+        self.smtp = Controller(self.inbox, hostname="127.0.0.1", port=free_port())
+        self.smtp.start()
+        self.addCleanup(self.smtp.stop)
+
+        self.queue = mailer.MailQueue(store_name="test-mail.sqlite3")
+        self.pool = SMTPPool("127.0.0.1", self.smtp.port, starttls=False)
+        self.addCleanup(self.pool.close)
+        self.sender = mailer.Sender(self.queue, self.pool)
+
+    def test_delivers_queued_mail(self):
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        self.assertEqual(self.sender.drain(), 1)
+        self.assertEqual(self.queue.count(), 0)
+        self.assertEqual(len(self.inbox.messages), 1)
+        self.assertEqual(self.inbox.messages[0].rcpt_tos, ["you@example.com"])
+
+    def test_background_thread(self):
+        self.sender.start()
+        self.addCleanup(self.sender.stop)
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        self.sender.wake()
+        deadline = time.time() + 5
+        while not self.inbox.messages and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.inbox.messages), 1)
+
+    def test_started_sender_delivers_spooled_mail(self):
+        # left behind by a worker that was recycled before delivering it
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        with mock.patch.multiple(mailer, queue=self.queue, pool=self.pool, _sender=None), \
+                mock.patch.object(mailer, "enqueue") as enqueue:
+            sender = mailer.start_sender()
+            self.addCleanup(sender.stop)
+            deadline = time.time() + 5
+            while not self.inbox.messages and time.time() < deadline:
+                time.sleep(0.01)
+        enqueue.assert_not_called()
+        self.assertEqual(len(self.inbox.messages), 1)
+        self.assertEqual(self.queue.count(), 0)
+
+    def test_retry_with_backoff(self):
+        sender = mailer.Sender(self.queue, SMTPPool("127.0.0.1", free_port(), starttls=False))
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        with self.assertLogs(mailer.logger, "ERROR"):
+            self.assertEqual(sender.drain(), 1)
+
+        # nothing due until the backoff has expired
+        self.assertEqual(self.queue.claim(), [])
+        mail, = self.queue.claim(now=time.time() + mailer.BACKOFF_BASE)
+        self.assertEqual(mail.attempts, 1)
+
+    def test_expired_lease_is_not_sent_twice(self):
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        mail, = self.queue.claim()
+        # a slow batch: the lease ran out and another worker claimed the message
+        self.assertEqual([m.id for m in self.queue.claim(now=mail.leased_until)], [mail.id])
+
+        error, = self.pool.send_batch([mail], before_send=self.queue.renew)
+        self.assertIsInstance(error, mailer.LeaseLost)
+        self.assertEqual(self.inbox.messages, [])
+
+    def test_lease_is_renewed_before_sending(self):
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        mail, = self.queue.claim()
+        renewed = self.queue.renew(mail, now=mail.leased_until - 1)
+        self.assertGreater(renewed.leased_until, mail.leased_until)
+        self.assertEqual(self.queue.claim(now=mail.leased_until), [])
+
+    def test_gives_up(self):
+        self.queue.put("me@example.com", ["you@example.com"], "Subject: hi\n\nhello")
+        mail, = self.queue.claim()
+        for attempt in range(mailer.MAX_ATTEMPTS):
+            status = self.queue.retry(mail._replace(attempts=attempt), "boom")
+        self.assertEqual(status, "failed")
+        self.assertEqual(self.queue.count("failed"), 1)
+
+
+class TestContact(unittest.TestCase):
+
+    def setUp(self):
+        # rate limits and duplicates of earlier runs (or of a site served from this host) stay out of it
+        runtime_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(runtime_dir.cleanup)
+        patch = mock.patch.object(store, "RUNTIME_DIR", runtime_dir.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    @mock.patch.dict(os.environ, {"EMAIL": "me@example.com", "PASSWORD": "x", "EMAIL_TO": "you@example.com"})
+    @mock.patch("app.mailer.start_sender")
+    @mock.patch("app.mailer.enqueue")
+    def test_contact_is_accepted(self, enqueue, _):
+        response = app.test_client().post(
+            "/contact",
+            base_url="https://www.tommasoscotti.com",
+            data={"email": "a@b.c", "message": "hi", "lang": "en", "ts": str(int((time.time() - 10) * 1000))},
+        )
+        self.assertEqual(response.status_code, 202)
+        enqueue.assert_called_once()
+        self.assertEqual(enqueue.call_args[0][1], ["you@example.com"])
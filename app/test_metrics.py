@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from app import app, metrics
+
+HTTPS = {"X-Forwarded-Proto": "https"}
+
+# one gunicorn worker: a few requests, then its metrics file stays behind
+WORKER = """
+from app import app
+client = app.test_client()
+for _ in range(3):
+    client.get("https://www.tommasoscotti.com/en", headers={"X-Forwarded-Proto": "https"})
+"""
+
+SCRAPE = """
+from app import app
+print(app.test_client().get("https://www.tommasoscotti.com/metrics", headers={"X-Forwarded-Proto": "https"}).data.decode())
+"""
+
+
+def sample(text, name, **labels):
+    prefix = name + "{" + ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+@unittest.skipIf(metrics.prometheus_client is None, "prometheus_client is not installed")
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def get(self, path):
+        return self.client.get("https://www.tommasoscotti.com" + path, headers=HTTPS)
+
+    def scrape(self):
+        return self.get("/metrics").data.decode()
+
+    def test_server_timing(self):
+        response = self.get("/en")
+        self.assertRegex(response.headers["Server-Timing"], r"(^|, )total;dur=\d+\.\d\d$")
+
+        redirect = self.client.get("http://tommasoscotti.com/en")
+        self.assertEqual(redirect.status_code, 301)
+        self.assertRegex(redirect.headers["Server-Timing"], r"^redirect;dur=")
+
+        with app.test_request_context():
+            with metrics.timed("template"):
+                pass
+            with metrics.timed("template"):
+                pass
+            self.assertEqual(list(metrics.g.server_timing), ["template"])
+        self.assertEqual(metrics.server_timing({"spool": 0.0123}, 0.02), "spool;dur=12.30, total;dur=20.00")
+
+    def test_latency_and_cache_counters(self):
+        before = self.scrape()
+        self.get("/jp")
+        self.get("/jp")
+        after = self.scrape()
+
+        labels = dict(endpoint="index_jp", method="GET", status="200")
+        count = sample(after, "http_request_duration_seconds_count", **labels)
+        self.assertEqual(count - (sample(before, "http_request_duration_seconds_count", **labels) or 0), 2)
+        lookups = lambda text: sum(  # noqa: E731
+            sample(text, "cache_requests_total", cache="pages", result=result) or 0 for result in ("hit", "store", "miss")
+        )
+        self.assertEqual(lookups(after) - lookups(before), 2)
+        self.assertTrue(sample(after, "cache_requests_total", cache="pages", result="hit"))
+        self.assertEqual(sample(after, "http_requests_in_flight", endpoint="index_jp"), 0)
+
+    def test_aggregates_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, prometheus_multiproc_dir=tmp, HOKUTHOM_RUNTIME_DIR=tmp)
+            run = lambda code: subprocess.run(  # noqa: E731
+                [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            ).stdout
+            run(WORKER)
+            run(WORKER)
+            text = run(SCRAPE)
+        self.assertEqual(sample(text, "http_request_duration_seconds_count", endpoint="index_en", method="GET", status="200"), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
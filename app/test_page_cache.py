@@ -0,0 +1,84 @@
+import gzip
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from app import app, store
+from app.page_cache import PageCache
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        # clear() below must not empty the page cache of a site served from this host
+        runtime_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(runtime_dir.cleanup)
+        patch = mock.patch.object(store, "RUNTIME_DIR", runtime_dir.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.renders = []
+
+        def render(lang):
+            self.renders.append(lang)
+            return f"<html>{lang}</html>"
+
+        self.cache = PageCache(render, version="test")
+        self.cache.clear()
+
+    def test_renders_once_per_lang_and_day(self):
+        self.cache.get("en")
+        self.cache.get("en")
+        self.cache.get("jp")
+        self.assertEqual(self.renders, ["en", "jp"])
+
+    def test_shared_through_store(self):
+        self.cache.get("it")
+        other = PageCache(lambda lang: self.fail("should not render"), version="test")
+        self.assertEqual(other.get("it").body, b"<html>it</html>")
+
+    def test_invalidated_at_midnight(self):
+        self.cache.get("en")
+        with mock.patch("app.page_cache.date") as fake_date:
+            fake_date.today.return_value = date(2100, 1, 1)
+            self.cache.get("en")
+        self.assertEqual(self.renders, ["en", "en"])
+
+    def test_encoded_once_and_shared(self):
+        body = self.cache.encoded("en", "gzip")
+        self.assertEqual(gzip.decompress(body), b"<html>en</html>")
+        with mock.patch("app.compression.compress", side_effect=AssertionError("compressed twice")):
+            self.assertEqual(self.cache.encoded("en", "gzip"), body)
+            other = PageCache(lambda lang: self.fail("should not render"), version="test")
+            other.get("en")
+            self.assertEqual(other.encoded("en", "gzip"), body)
+
+    def test_compressed_response(self):
+        client = app.test_client()
+        base_url = "https://www.tommasoscotti.com"
+        headers = {"X-Forwarded-Proto": "https", "Accept-Encoding": "gzip"}
+        response = client.get("/en", base_url=base_url, headers=headers)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertIn(b"<html", gzip.decompress(response.data))
+
+        plain = client.get("/en", base_url=base_url, headers={"X-Forwarded-Proto": "https"})
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertNotEqual(plain.headers["ETag"], response.headers["ETag"])
+
+    def test_conditional_get(self):
+        client = app.test_client()
+        base_url = "https://www.tommasoscotti.com"
+        first = client.get("/en", base_url=base_url, headers={"X-Forwarded-Proto": "https"})
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.headers["ETag"])
+        self.assertIn("Last-Modified", first.headers)
+
+        again = client.get(
+            "/en",
+            base_url=base_url,
+            headers={"X-Forwarded-Proto": "https", "If-None-Match": first.headers["ETag"]},
+        )
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
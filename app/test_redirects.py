@@ -0,0 +1,46 @@
+import unittest
+
+from app import app
+from app.redirects import RedirectMiddleware
+
+
+class TestRedirects(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def get(self, url, https=True):
+        headers = {"X-Forwarded-Proto": "https"} if https else {}
+        return self.client.get(url, headers=headers)
+
+    def test_canonical_www_keeps_path_and_query(self):
+        response = self.get("http://tommasoscotti.com/jp?x=1&y=%C3%A9")
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response.headers["Location"], "https://www.tommasoscotti.com/jp?x=1&y=%C3%A9")
+        response = self.get("https://TomScotti.com:443/")
+        self.assertEqual(response.headers["Location"], "https://www.tomscotti.com/")
+
+    def test_tomscotti_lands_on_english(self):
+        for path in ("/", "/index"):
+            response = self.get("https://www.tomscotti.com" + path)
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.headers["Location"], "https://www.tomscotti.com/en")
+        self.assertEqual(self.get("https://www.tomscotti.com/jp").status_code, 200)
+
+    def test_force_https(self):
+        response = self.get("http://www.tommasoscotti.com/it?a=b", https=False)
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response.headers["Location"], "https://www.tommasoscotti.com/it?a=b")
+        self.assertEqual(self.get("http://www.tommasoscotti.com/it").status_code, 200)
+
+    def test_static_bypasses_redirects(self):
+        response = self.get("http://tommasoscotti.com/static/css/style.css", https=False)
+        self.assertEqual(response.status_code, 200)
+
+    def test_development_keeps_http(self):
+        middleware = RedirectMiddleware(lambda environ, start_response: None, force_https=False)
+        self.assertIsNone(middleware.match({"HTTP_HOST": "localhost:5000", "PATH_INFO": "/", "wsgi.url_scheme": "http"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from typing import List, NamedTuple
+
+from app.smtp_pool import SMTPPool
+from app.test_mailer import Controller, Inbox, free_port
+
+
+class Mail(NamedTuple):
+    sender: str
+    recipients: List[str]
+    message: str
+
+
+def mails(count: int) -> List[Mail]:
+    return [Mail("me@example.com", ["you@example.com"], f"Subject: {i}\n\nhello") for i in range(count)]
+
+
+@unittest.skipIf(Controller is None, "aiosmtpd is not installed")
+class TestSMTPPool(unittest.TestCase):
+
+    def setUp(self):
+        self.inbox = Inbox()
+        self.smtp = Controller(self.inbox, hostname="127.0.0.1", port=free_port())
+        self.smtp.start()
+        self.addCleanup(self.smtp.stop)
+        self.pool = SMTPPool("127.0.0.1", self.smtp.port, starttls=False)
+        self.addCleanup(self.pool.close)
+
+    def test_batch_over_one_session(self):
+        self.assertEqual(self.pool.send_batch(mails(3)), [None, None, None])
+        self.assertEqual(self.pool.send_batch(mails(2)), [None, None])
+        self.assertEqual(len(self.inbox.messages), 5)
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["handshakes"], 1)
+        self.assertEqual(stats["sends"], 5)
+        self.assertGreater(stats["avg_handshake_seconds"], 0)
+
+    def test_reconnects_dropped_session(self):
+        self.pool.send_batch(mails(1))
+        # the server went away while the session was idle
+        self.pool._idle[0].smtp.close()
+
+        self.assertEqual(self.pool.send_batch(mails(2)), [None, None])
+        self.assertEqual(len(self.inbox.messages), 3)
+        self.assertEqual(self.pool.stats()["handshakes"], 2)
+
+    def test_keepalive(self):
+        self.pool.send_batch(mails(1))
+        self.pool.keepalive_after = 0
+        self.pool.keepalive()
+        self.assertEqual(self.pool.stats()["noops"], 1)
+        self.assertEqual(len(self.pool._idle), 1)
+
+        self.pool.max_age = 0
+        self.pool.keepalive()
+        self.assertEqual(len(self.pool._idle), 0)
+
+    def test_unreachable_server_fails_the_batch(self):
+        pool = SMTPPool("127.0.0.1", free_port(), starttls=False)
+        errors = pool.send_batch(mails(2))
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(isinstance(error, OSError) for error in errors))
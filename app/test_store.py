@@ -0,0 +1,41 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from app import store
+
+
+class TestStore(unittest.TestCase):
+
+    def test_connection_per_thread(self):
+        conn = store.connect("test.sqlite3")
+        self.assertIs(store.connect("test.sqlite3"), conn)
+
+        others = []
+        thread = threading.Thread(target=lambda: others.append(store.connect("test.sqlite3")))
+        thread.start()
+        thread.join()
+        self.assertIsNot(others[0], conn)
+
+    def test_connection_per_runtime_dir(self):
+        conn = store.connect("test.sqlite3")
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(store, "RUNTIME_DIR", tmp):
+            other = store.connect("test.sqlite3")
+            self.assertIsNot(other, conn)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "test.sqlite3")))
+            other.close()
+
+    def test_greenlets_share_their_thread_connection(self):
+        try:
+            import gevent
+        except ImportError:
+            self.skipTest("gevent not installed")
+
+        conns = [g.value for g in gevent.joinall([gevent.spawn(store.connect, "test.sqlite3") for _ in range(3)])]
+        self.assertEqual({id(conn) for conn in conns}, {id(store.connect("test.sqlite3"))})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Cost of parse_moment on the inputs of test_rest_api, legacy vs layered.
+
+"legacy" is the old implementation (dateutil for everything but the keywords),
+"uncached" the layered parser with its cache cleared before every call (so the
+keyword/ISO fast paths and the dateutil fallback are what is timed), "cached"
+the layered parser as it runs in the API. Runs against bluebear's REST package:
+
+    python -m benchmarks.bench_moments
+"""
+
+import timeit
+from datetime import datetime
+
+from dateutil import parser
+
+from bluebear.app_pkg.controllers.api import moments
+
+
+INPUTS = ['now', '2019 - 06 - 26', '2019-06-26T04:42:24+00:00', '2019-06-26T04:42:24Z', '20190626T044224Z']
+
+
+def legacy_parse_moment(moment: str) -> str:
+    if moment in ['now', 'today']:
+        as_of_utc = datetime.now()
+    else:
+        as_of_utc = parser.parse(moment).replace(tzinfo=None)
+    return str(as_of_utc.replace(tzinfo=None).replace(hour=22, minute=0, second=0, microsecond=0))
+
+
+def uncached_parse_moment(moment: str) -> str:
+    moments._parse_cached.cache_clear()
+    return moments.parse_moment(moment)
+
+
+def main():
+    candidates = {
+        "legacy": legacy_parse_moment,
+        "uncached": uncached_parse_moment,
+        "cached": moments.parse_moment,
+    }
+    print(f"{'input':28s}" + "".join(f"{name:>12s}" for name in candidates) + "   (us/call)")
+    for moment in INPUTS:
+        assert len({func(moment) for func in candidates.values()}) == 1, moment
+        timings = [
+            min(timeit.repeat(lambda: func(moment), number=2000, repeat=5)) / 2000 for func in candidates.values()
+        ]
+        print(f"{moment:28s}" + "".join(f"{seconds * 1e6:12.2f}" for seconds in timings))
+
+
+if __name__ == "__main__":
+    main()
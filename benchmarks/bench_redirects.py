@@ -0,0 +1,115 @@
+"""
+Redirect latency under concurrency, before_request vs the WSGI redirect layer.
+
+Both apps are minimal Flask apps serving the real static folder; the legacy one
+runs the old `before_request` host/scheme checks, the other is wrapped in
+`RedirectMiddleware`. Like `wrk -c <concurrency>`, every thread keeps one request
+in flight for the whole run; the WSGI apps are called in process, so the numbers
+are the cost of the app alone, without sockets.
+
+    python -m benchmarks.bench_redirects [--concurrency 64] [--seconds 3]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, redirect, request
+from werkzeug.test import EnvironBuilder
+
+from app import app as site
+from app.redirects import RedirectMiddleware
+
+
+SCENARIOS = {
+    # name: (base url, path, headers)
+    "redirect www": ("http://tommasoscotti.com", "/jp?ref=x", {}),
+    "redirect https": ("http://www.tommasoscotti.com", "/it", {}),
+    "static file": ("https://www.tommasoscotti.com", "/static/css/style.css", {"X-Forwarded-Proto": "https"}),
+    "page": ("https://www.tommasoscotti.com", "/ok", {"X-Forwarded-Proto": "https"}),
+}
+
+
+def legacy_before_request():
+    # the checks routes.before_request used to run on every request
+    host = (request.host or "").lower().split(":")[0]
+    path = request.path or "/"
+    full_path = request.full_path or path
+    if host == "tommasoscotti.com":
+        return redirect("https://www.tommasoscotti.com" + full_path, code=301)
+    if host == "tomscotti.com":
+        return redirect("https://www.tomscotti.com" + full_path, code=301)
+    if host == "www.tomscotti.com" and path in ("/", "/index"):
+        return redirect("https://www.tomscotti.com/en", code=302)
+    proto = request.headers.get("X-Forwarded-Proto", request.scheme)
+    if proto != "https":
+        return redirect(request.url.replace("http://", "https://", 1), code=301)
+
+
+def make_app(legacy: bool):
+    app = Flask("bench", static_folder=site.static_folder)
+    app.add_url_rule("/ok", "ok", lambda: "ok")
+    if legacy:
+        app.before_request(legacy_before_request)
+    else:
+        app.wsgi_app = RedirectMiddleware(app.wsgi_app)
+    return app
+
+
+def call(wsgi_app, environ):
+    status = []
+    body = wsgi_app(dict(environ), lambda s, h, exc_info=None: status.append(s))
+    for _ in body:
+        pass
+    if hasattr(body, "close"):
+        body.close()
+    return status[0]
+
+
+def run(wsgi_app, environ, concurrency: int, seconds: float):
+    deadline = time.perf_counter() + seconds
+    latencies, lock = [], threading.Lock()
+
+    def worker():
+        mine = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            call(wsgi_app, environ)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    latencies.sort()
+    return {
+        "rps": len(latencies) / seconds,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    apps = {"before_request": make_app(legacy=True), "middleware": make_app(legacy=False)}
+    print(f"{'scenario':15s} {'app':15s} {'status':>6s} {'req/s':>9s} {'p50 us':>9s} {'p99 us':>9s}")
+    for scenario, (base_url, path, headers) in SCENARIOS.items():
+        environ = EnvironBuilder(path, base_url=base_url, headers=headers).get_environ()
+        for name, app in apps.items():
+            status = call(app.wsgi_app, environ).split()[0]
+            stats = run(app.wsgi_app, environ, args.concurrency, args.seconds)
+            print(
+                f"{scenario:15s} {name:15s} {status:>6s} {stats['rps']:9.0f}"
+                f" {stats['p50'] * 1e6:9.1f} {stats['p99'] * 1e6:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
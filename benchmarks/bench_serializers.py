@@ -0,0 +1,53 @@
+"""
+Serialization cost of balance responses, legacy vs the REST serializer layer.
+
+The legacy path is what TotalBalanceAsOfDate.get did: json.dumps with indent=2
+and default=str. The new one is serializers.dumps, compact, with the standard
+library and (if installed) orjson. Runs against bluebear's REST package:
+
+    python -m benchmarks.bench_serializers [--currencies 5000]
+"""
+
+import argparse
+import json
+import random
+import timeit
+from decimal import Decimal
+from unittest import mock
+
+from bluebear.app_pkg.controllers.api import serializers
+
+
+def balance_map(currencies: int) -> dict:
+    rng = random.Random(42)
+    return {
+        'as_of_utc': '2019-06-26 22:00:00',
+        'balance': {f'C{i:05d}': Decimal(rng.randrange(10 ** 12)) / 100 for i in range(currencies)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--currencies", type=int, default=5000)
+    args = parser.parse_args()
+
+    data = balance_map(args.currencies)
+    candidates = {
+        "legacy indent=2": lambda: json.dumps(data, indent=2, default=str).encode(),
+        "stdlib compact": lambda: serializers.dumps(data),
+        "stdlib pretty": lambda: serializers.dumps(data, pretty=True),
+    }
+    if serializers.orjson is not None:
+        candidates["orjson compact"] = lambda: serializers.dumps(data)
+        candidates["orjson pretty"] = lambda: serializers.dumps(data, pretty=True)
+
+    for name, func in candidates.items():
+        backend = serializers.orjson if name.startswith("orjson") else None
+        with mock.patch.object(serializers, "orjson", backend):
+            seconds = min(timeit.repeat(func, number=20, repeat=5)) / 20
+            size = len(func())
+        print(f"{name:16s} {seconds * 1e3:8.2f} ms/response {size / 1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Gunicorn startup time and memory, with and without preload.
+
+Starts gunicorn with gunicorn.conf.py (sync workers so every request lands on
+one process at a time), waits for the first page, sends a round of page requests
+so every worker has rendered, then reads the memory of the master and the
+workers from /proc (Linux only). PSS splits shared pages between the processes
+that map them, so its sum is the real footprint; RSS counts them once per process.
+
+    python -m benchmarks.bench_startup [--workers 4]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[key] = int(value.split()[0])
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def get(url: str) -> int:
+    request = urllib.request.Request(url, headers={"Host": "www.tommasoscotti.com", "X-Forwarded-Proto": "https"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        response.read()
+        return response.status
+
+
+def run(preload: bool, workers: int) -> dict:
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD="1" if preload else "0",
+        GUNICORN_WORKER_CLASS="sync",
+    )
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        ["gunicorn", "--config", "gunicorn.conf.py", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/it"
+        while True:
+            try:
+                get(url)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError("gunicorn exited")
+                time.sleep(0.02)
+        first_page = time.perf_counter() - start
+
+        for _ in range(workers * 10):
+            get(url)
+        time.sleep(0.5)
+        processes = [server.pid] + children(server.pid)
+        usage = [memory(pid) for pid in processes]
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "first_page": first_page,
+        "processes": len(processes),
+        **{key: sum(u[key] for u in usage) for key in ("rss", "pss", "private")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'mode':10s} {'first page s':>12s} {'processes':>9s} {'RSS MB':>8s} {'PSS MB':>8s} {'private MB':>10s}")
+    for preload in (False, True):
+        stats = run(preload, args.workers)
+        print(
+            f"{'preload' if preload else 'no preload':10s} {stats['first_page']:12.2f} {stats['processes']:9d}"
+            f" {stats['rss'] / 1024:8.1f} {stats['pss'] / 1024:8.1f} {stats['private'] / 1024:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Micro-benchmark of the per-request translation lookup.
+
+Compares the frozen catalog against the legacy behaviour, which rebuilt the
+nested it/en/jp dict on every call and then picked one language.
+
+    python -m benchmarks.bench_translations
+"""
+
+import timeit
+import tracemalloc
+
+from app import i18n
+from app.routes import get_translations
+
+
+def legacy_get_translations(lang: str) -> dict:
+    # what the old dict literal cost: a fresh dict per language on every call
+    T = {code: dict(strings) for code, strings in i18n.CATALOG.items()}
+    return T[lang]
+
+
+def allocated_per_call(func, calls: int = 1000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [func("en") for _ in range(calls)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size / calls
+
+
+def main():
+    for name, func in (("legacy", legacy_get_translations), ("catalog", get_translations)):
+        seconds = min(timeit.repeat(lambda: func("en"), number=10000, repeat=5)) / 10000
+        print(f"{name:8s} {seconds * 1e6:8.2f} us/call {allocated_per_call(func):10.0f} bytes/call")
+
+
+if __name__ == "__main__":
+    main()
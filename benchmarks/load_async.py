@@ -0,0 +1,167 @@
+"""
+Page latency while slow contact/API requests are in flight, per worker class.
+
+Runs one gunicorn worker (gunicorn.conf.py, sync / gthread / gevent) of the site
+plus a stand-in for the balance API: `/total_balance_as_of_date/<moment>` waits
+on a local upstream that answers after --upstream-delay seconds, the way the
+real endpoint waits on InfluxDB. SMTP points at a closed port, so the contact
+sender fails fast and retries in the background. While --slow clients keep
+contact and API requests going, a few clients fetch pages; with a sync worker
+the pages queue behind the API calls, with gevent they do not.
+
+    python -m benchmarks.load_async [--seconds 5] [--slow 16]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import app
+
+
+UPSTREAM_URL = os.environ.get("LOAD_UPSTREAM_URL")
+
+if UPSTREAM_URL:
+    @app.route("/total_balance_as_of_date/<string:moment>")
+    def total_balance_stand_in(moment):
+        with urllib.request.urlopen(f"{UPSTREAM_URL}?moment={moment}", timeout=30) as response:
+            return app.response_class(response.read(), mimetype="application/json")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_upstream(delay: float) -> ThreadingHTTPServer:
+    class Upstream(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps({"balance": {"EUR": "1.00"}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), Upstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def request(url: str, data: bytes = None) -> float:
+    headers = {"Host": "www.tommasoscotti.com", "X-Forwarded-Proto": "https"}
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(url, data, headers), timeout=60) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def contact_form() -> bytes:
+    return urllib.parse.urlencode({
+        "name": "Load", "email": "load@example.com", "subject": "load test", "message": "hello",
+        "lang": "en", "ts": str(int((time.time() - 60) * 1000)),
+    }).encode()
+
+
+def run(worker_class: str, upstream: str, seconds: float, slow: int, page_clients: int) -> dict:
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port), WEB_CONCURRENCY="1", GUNICORN_WORKER_CLASS=worker_class, GUNICORN_THREADS="4",
+        LOAD_UPSTREAM_URL=upstream, SMTP_HOST="127.0.0.1", SMTP_PORT=str(free_port()),
+        EMAIL="site@example.com", PASSWORD="x", EMAIL_TO="me@example.com",
+    )
+    server = subprocess.Popen(
+        ["gunicorn", "--config", "gunicorn.conf.py", "benchmarks.load_async:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        while True:
+            try:
+                request(base + "/it")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError("gunicorn exited")
+                time.sleep(0.05)
+
+        deadline = time.perf_counter() + seconds
+        results = {"page": [], "api": [], "contact": []}
+        lock = threading.Lock()
+
+        def client(kind):
+            mine = []
+            while time.perf_counter() < deadline:
+                try:
+                    if kind == "page":
+                        mine.append(request(base + "/it"))
+                    elif kind == "api":
+                        mine.append(request(base + "/total_balance_as_of_date/today"))
+                    else:
+                        mine.append(request(base + "/contact", contact_form()))
+                except (urllib.error.URLError, ConnectionError, socket.timeout):
+                    pass
+            with lock:
+                results[kind].extend(mine)
+
+        clients = (
+            [threading.Thread(target=client, args=("page",)) for _ in range(page_clients)]
+            + [threading.Thread(target=client, args=("api",)) for _ in range(slow)]
+            + [threading.Thread(target=client, args=("contact",)) for _ in range(slow)]
+        )
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    pages = sorted(results["page"])
+    return {
+        "pages": len(pages),
+        "page_p50": statistics.median(pages) if pages else float("nan"),
+        "page_p99": pages[int(len(pages) * 0.99)] if pages else float("nan"),
+        "api": len(results["api"]),
+        "contacts": len(results["contact"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--slow", type=int, default=16, help="clients each for contact and API requests")
+    parser.add_argument("--pages", type=int, default=4, help="clients fetching pages")
+    parser.add_argument("--upstream-delay", type=float, default=0.5)
+    parser.add_argument("--workers", nargs="+", default=["sync", "gthread", "gevent"])
+    args = parser.parse_args()
+
+    upstream = start_upstream(args.upstream_delay)
+    upstream_url = f"http://127.0.0.1:{upstream.server_port}/"
+    print(f"{'worker':8s} {'pages':>6s} {'page p50 ms':>11s} {'page p99 ms':>11s} {'api calls':>9s} {'contacts':>8s}")
+    for worker_class in args.workers:
+        stats = run(worker_class, upstream_url, args.seconds, args.slow, args.pages)
+        print(
+            f"{worker_class:8s} {stats['pages']:6d} {stats['page_p50'] * 1e3:11.1f} {stats['page_p99'] * 1e3:11.1f}"
+            f" {stats['api']:9d} {stats['contacts']:8d}"
+        )
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
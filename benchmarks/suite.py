@@ -0,0 +1,338 @@
+"""
+Benchmark and load suite of the site and the balance API, with JSON reports.
+
+Micro-benchmarks time get_translations, render_index, the redirect matching,
+parse_moment and balances_to_map per call. The load harness then drives the
+WSGI apps in process at a fixed concurrency (every thread keeps one request in
+flight) for a fixed number of requests per scenario, after a warm-up, and
+records p50/p95/p99 latency and throughput. SMTP is a local sink and InfluxDB
+a stand-in Queryman answering after --backend-delay, so it all runs offline.
+The API parts need bluebear's REST package and are skipped without it.
+
+    python -m benchmarks.suite [--output report.json] [--requests 2000] [--concurrency 16]
+    python -m benchmarks.suite --compare before.json after.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from unittest import mock
+
+from flask import Flask
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from app import admission, app as site, mailer, store
+from app.redirects import RedirectMiddleware
+from app.routes import get_translations, render_index
+from app.smtp_pool import SMTPPool
+
+try:
+    from bluebear.app_pkg.controllers.api import moments, rest_api
+    from bluebear.app_pkg.controllers.api.client_pool import ClientPool
+    from bluebear.app_pkg.controllers.api.snapshots import SnapshotCache
+except ImportError:
+    rest_api = None
+
+
+SITE = "https://www.tommasoscotti.com"
+HTTPS = {"X-Forwarded-Proto": "https"}
+PERCENTILES = (50, 95, 99)
+
+
+class SMTPSink(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP to accept mail (no STARTTLS, no AUTH) and count it.
+    """
+
+    def handle(self):
+        self.wfile.write(b"220 sink ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            if command == b"DATA":
+                self.wfile.write(b"354 end with .\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.delivered += 1
+            self.wfile.write(b"250 sink\r\n" if command == b"EHLO" else b"250 ok\r\n")
+
+
+def start_smtp_sink() -> socketserver.ThreadingTCPServer:
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPSink)
+    server.daemon_threads = True
+    server.delivered, server.lock = 0, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StandInQueryman:
+    """
+    Queryman answering every as-of date with `series` balance series after `delay` seconds.
+    """
+
+    def __init__(self, delay: float, series: int = 50):
+        self.delay = delay
+        self.series = series
+
+    def get_balances(self, as_of_utc):
+        time.sleep(self.delay)
+        day = int(as_of_utc[8:10])
+        return {
+            float(i): iter([{"base_ccy": ("EUR", "USD", "JPY", "GBP")[i % 4], "balance": day * 100 + i}])
+            for i in range(self.series)
+        }
+
+
+def micro(func: Callable, number: int) -> dict:
+    timings = [seconds / number * 1e6 for seconds in timeit.repeat(func, number=number, repeat=7)]
+    return {"us_min": round(min(timings), 3), "us_median": round(sorted(timings)[len(timings) // 2], 3)}
+
+
+def micro_benchmarks() -> Dict[str, dict]:
+    results = {
+        "get_translations": micro(lambda: get_translations("en"), 100000),
+    }
+    with site.test_request_context(base_url=SITE):
+        results["render_index"] = micro(lambda: render_index("en"), 200)
+
+    middleware = RedirectMiddleware(lambda environ, start_response: None)
+    for name, (base_url, path, headers) in {
+        "redirect www": ("http://tommasoscotti.com", "/jp?ref=x", {}),
+        "redirect https": ("http://www.tommasoscotti.com", "/it", {}),
+        "redirect none": (SITE, "/it", HTTPS),
+    }.items():
+        environ = EnvironBuilder(base_url=base_url, path=path, headers=headers).get_environ()
+        results[name] = micro(lambda: middleware.match(environ), 100000)
+
+    if rest_api is None:
+        print("bluebear's REST package is not importable: skipping the API benchmarks", file=sys.stderr)
+        return results
+
+    results["parse_moment cached"] = micro(lambda: moments.parse_moment("2019-06-26T04:42:24Z"), 100000)
+
+    def parse_uncached():
+        moments._parse_cached.cache_clear()
+        moments.parse_moment("2019-06-26T04:42:24Z")
+
+    results["parse_moment uncached"] = micro(parse_uncached, 20000)
+
+    for size in (50, 5000):
+        series = {float(i): [{"base_ccy": f"C{i % 20}", "balance": i}] for i in range(size)}
+        # the iterators are rebuilt on every call, as get_balances hands out fresh ones
+        results[f"balances_to_map {size}"] = micro(
+            lambda: rest_api.TotalBalanceAsOfDate.balances_to_map({k: iter(v) for k, v in series.items()}),
+            max(10, 100000 // size),
+        )
+    return results
+
+
+def percentile(values: List[float], p: float) -> float:
+    # nearest rank
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def drive(wsgi_app: Callable, make_environ: Callable[[int], dict], requests: int, concurrency: int) -> dict:
+    """
+    Send `requests` requests to `wsgi_app` from `concurrency` threads, each with one request in flight.
+    """
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def worker():
+        mine, codes = [], {}
+        while True:
+            i = next(counter)
+            if i >= requests:
+                break
+            environ = make_environ(i)
+            started = time.perf_counter()
+            _, status, _ = run_wsgi_app(wsgi_app, environ, buffered=True)
+            mine.append(time.perf_counter() - started)
+            codes[status[:3]] = codes.get(status[:3], 0) + 1
+        with lock:
+            latencies.extend(mine)
+            for code, count in codes.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    report = {"requests": len(latencies), "rps": round(len(latencies) / elapsed, 1), "statuses": statuses}
+    for p in PERCENTILES:
+        report[f"p{p}_ms"] = round(percentile(latencies, p) * 1e3, 3)
+    return report
+
+
+def environ_for(base_url: str, path: str, headers=None, **kwargs) -> Callable[[int], dict]:
+    return lambda i: EnvironBuilder(base_url=base_url, path=path, headers=HTTPS if headers is None else headers, **kwargs).get_environ()
+
+
+def contact_form(i: int, ip: str = None) -> dict:
+    # a client IP per request, unless flooding from one
+    headers = {**HTTPS, "X-Forwarded-For": ip or f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}
+    return EnvironBuilder(base_url=SITE, path="/contact", method="POST", headers=headers, data={
+        "name": "Load", "email": f"load{i}@example.com", "subject": "load test", "message": f"hello {i}",
+        "lang": "en", "ts": str(int((time.time() - 60) * 1000)),
+    }).get_environ()
+
+
+def scenarios() -> Dict[str, tuple]:
+    site_app = site.wsgi_app
+    found = {
+        "page": (site_app, environ_for(SITE, "/it", {**HTTPS, "Accept-Encoding": "br, gzip"})),
+        "page revalidated": (site_app, environ_for(SITE, "/en", {**HTTPS, "If-None-Match": "*"})),
+        "redirect": (site_app, environ_for("http://tommasoscotti.com", "/jp", {})),
+        "static": (site_app, environ_for(SITE, "/static/css/style.css")),
+        "contact": (site_app, contact_form),
+        "contact flood": (site_app, lambda i: contact_form(i, ip="203.0.113.7")),
+    }
+    if rest_api is not None:
+        api = rest_api.register_rest(Flask("balance_api")).wsgi_app
+        # a year of past days: misses on the first pass, snapshot cache hits after
+        days = [f"2019-{month:02d}-{day:02d}" for month in range(1, 13) for day in range(1, 29)]
+        found["api as-of"] = (
+            api, lambda i: EnvironBuilder(path=f"/total_balance_as_of_date/{days[i % len(days)]}").get_environ()
+        )
+        found["api range 30d"] = (api, environ_for("http://localhost", "/total_balance_range/2019-06-01/2019-06-30"))
+    return found
+
+
+def run(requests: int, concurrency: int, backend_delay: float, only: List[str]) -> dict:
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "backend_delay": backend_delay,
+        },
+    }
+    with ExitStack() as stack:
+        runtime_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        sink = start_smtp_sink()
+        stack.callback(sink.shutdown)
+        stack.enter_context(mock.patch.object(store, "RUNTIME_DIR", runtime_dir))
+        stack.enter_context(mock.patch.object(
+            mailer, "pool", SMTPPool("127.0.0.1", sink.server_address[1], starttls=False)
+        ))
+        # the global bucket would turn the accepted-contact scenario into a rate-limit one
+        stack.enter_context(mock.patch.object(admission, "GLOBAL_LIMIT", admission.Limit(1e9, 1e9)))
+        stack.enter_context(mock.patch.dict(
+            os.environ, {"EMAIL": "site@example.com", "PASSWORD": "x", "EMAIL_TO": "me@example.com"}
+        ))
+        if rest_api is not None:
+            stack.enter_context(mock.patch.object(
+                rest_api, "queryman_pool", ClientPool(lambda: StandInQueryman(backend_delay), size=concurrency)
+            ))
+            stack.enter_context(mock.patch.object(
+                rest_api, "snapshot_cache", SnapshotCache()
+            ))
+
+        if not only or "micro" in only:
+            report["micro"] = micro_benchmarks()
+
+        report["load"] = {}
+        for name, (wsgi_app, make_environ) in scenarios().items():
+            if only and name not in only:
+                continue
+            drive(wsgi_app, make_environ, min(requests, 100), concurrency)    # warm-up
+            report["load"][name] = drive(wsgi_app, make_environ, requests, concurrency)
+        report["meta"]["mails_delivered"] = sink.delivered
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict):
+    for name, stats in report.get("micro", {}).items():
+        print(f"{name:24s} {stats['us_median']:12.3f} us/call")
+    print(f"\n{'scenario':24s} {'req/s':>9s}" + "".join(f"{f'p{p} ms':>10s}" for p in PERCENTILES) + "  statuses")
+    for name, stats in report["load"].items():
+        print(
+            f"{name:24s} {stats['rps']:9.1f}" + "".join(f"{stats[f'p{p}_ms']:10.3f}" for p in PERCENTILES)
+            + f"  {stats['statuses']}"
+        )
+
+
+def compare(before: dict, after: dict):
+    """
+    Print the change of every metric found in both reports (positive: slower, or fewer requests per second).
+    """
+    print(f"{'':34s} {'before':>10s} {'after':>10s} {'change':>8s}")
+    rows = [("micro", name, "us_median") for name in after.get("micro", {})]
+    rows += [("load", name, metric) for name in after["load"] for metric in ["rps"] + [f"p{p}_ms" for p in PERCENTILES]]
+    for section, name, metric in rows:
+        old = before.get(section, {}).get(name, {}).get(metric)
+        new = after[section][name][metric]
+        if not old:
+            continue
+        change = (old / new - 1) if metric == "rps" else (new / old - 1)
+        print(f"{name + ' ' + metric:34s} {old:10.3f} {new:10.3f} {change:+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000, help="per load scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backend-delay", type=float, default=0.005, help="seconds of the stand-in InfluxDB query")
+    parser.add_argument("--only", nargs="*", default=[], help="'micro' and/or load scenario names")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare the run with this JSON report")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+
+    report = run(args.requests, args.concurrency, args.backend_delay, args.only)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print()
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Gunicorn settings (the Procfile passes this file explicitly).
+
+The app is imported once in the master (preload) and warmed up there, so the
+compiled templates, translation catalog and rendered pages sit in memory pages
+the workers share copy-on-write. Every setting can be overridden from the
+environment, e.g. WEB_CONCURRENCY (set by Heroku) for the worker count.
+
+With GUNICORN_WORKER_CLASS=gevent (needs the gevent package) every request is a
+greenlet, so requests waiting on the network (SMTP delivery, InfluxDB queries)
+no longer hold a worker while pages keep rendering. The standard library is
+patched here, before the preloaded app creates its sockets, locks and threads.
+
+The workers write their metrics (app/metrics.py) to files in a directory
+shared with the master, emptied at startup, so /metrics adds up all of them.
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+
+# gthread by default; "gevent" or "sync" also work
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    from gevent import monkey
+
+    monkey.patch_all()
+
+# must be set before prometheus_client is imported
+metrics_dir = os.environ.setdefault(
+    "prometheus_multiproc_dir",
+    os.path.join(os.environ.get("HOKUTHOM_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), "hokuthom"), "metrics"),
+)
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+# concurrent requests per gevent worker
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "100"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+# recycle workers now and then, not all at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+timeout = 30
+graceful_timeout = 20
+keepalive = 5
+forwarded_allow_ips = "*"
+accesslog = "-"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from app.routes import warm_up
+
+    warm_up()
+    # keep the collector from writing to the shared objects (and copying their pages) in the workers
+    gc.freeze()
+    server.log.info("Warmed up before fork (%d objects frozen)", gc.get_freeze_count())
+
+
+def post_worker_init(worker):
+    # deliver the mail left in the spool (pending, or due for a retry) by the worker this one replaces,
+    # without waiting for the next contact message
+    from app import mailer
+
+    mailer.start_sender()
+
+
+def on_starting(server):
+    # counters of a previous run would be added to this one
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    # its in-flight gauges are no longer live
+    multiprocess.mark_process_dead(worker.pid, metrics_dir)